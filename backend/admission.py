@@ -0,0 +1,226 @@
+"""
+ABSOSUM - Admission Control
+Admits summarization work by estimated token cost before any model runs:
+- requests above a per-request token limit are rejected (too large for a
+  synchronous call; the async /jobs endpoints take them instead)
+- every client draws from its own token bucket (tokens/minute + burst)
+- the tokens of all admitted synchronous requests in flight are capped
+A client over its quota is rejected right away with a retry hint (waiting
+would hold a server thread per request). Only work that waits for in-flight
+tokens to free up is deferred, for up to `max_wait_seconds`, then rejected.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+REJECT_TOO_LARGE = "too_large"
+REJECT_QUOTA = "quota_exceeded"
+REJECT_OVERLOADED = "overloaded"
+
+
+class AdmissionRejected(Exception):
+    """Request refused by admission control (`status_code` and `retry_after` are for the HTTP response)"""
+
+    STATUS_CODES = {REJECT_TOO_LARGE: 413, REJECT_QUOTA: 429, REJECT_OVERLOADED: 503}
+
+    def __init__(self, reason: str, message: str, cost: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.cost = cost
+        self.retry_after = retry_after
+        self.status_code = self.STATUS_CODES[reason]
+
+
+class TokenBucket:
+    """
+    Refills at `rate` tokens/second up to `capacity`. A cost larger than the
+    capacity is admitted once the bucket is full and leaves it in debt, so
+    oversized (but allowed) work is paced instead of refused forever.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: int, now: float) -> float:
+        """Seconds until `cost` can be taken (0 = now)"""
+        self._refill(now)
+        needed = min(cost, self.capacity)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+    def take(self, cost: int):
+        self.tokens -= cost
+
+    def refund(self, cost: int):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+
+class AdmissionController:
+    """
+    `client_tokens_per_minute` / `client_burst_tokens`: per-client token bucket (0 = no quota)
+    `max_inflight_tokens`: tokens of admitted synchronous requests running at once (0 = no limit);
+    a single request larger than this still runs, but only when nothing else is in flight
+    `max_request_tokens`: largest synchronous request (0 = no limit)
+    `max_wait_seconds`: how long work waits for in-flight tokens before it is rejected
+    """
+
+    def __init__(
+        self,
+        client_tokens_per_minute: int = 0,
+        client_burst_tokens: int = 0,
+        max_inflight_tokens: int = 0,
+        max_request_tokens: int = 0,
+        max_wait_seconds: float = 10.0,
+        idle_client_seconds: float = 3600.0,
+    ):
+        self.client_rate = client_tokens_per_minute / 60.0
+        self.client_burst = client_burst_tokens or client_tokens_per_minute
+        self.max_inflight_tokens = max_inflight_tokens
+        self.max_request_tokens = max_request_tokens
+        self.max_wait_seconds = max_wait_seconds
+        self.idle_client_seconds = idle_client_seconds
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._inflight_tokens = 0
+        self._inflight_requests = 0
+        self._cond = threading.Condition()
+        self._admitted = 0
+        self._deferred = 0
+        self._rejected: Dict[str, int] = {REJECT_TOO_LARGE: 0, REJECT_QUOTA: 0, REJECT_OVERLOADED: 0}
+
+    # -------------------------------------------------------------------------
+    # Admission
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def admit(self, client: str, cost: int):
+        """
+        Admit a synchronous request of `cost` tokens for `client` (blocks while
+        waiting for in-flight tokens); its tokens count as in flight until the
+        block exits.
+        """
+        if self.max_request_tokens and cost > self.max_request_tokens:
+            self._reject(
+                REJECT_TOO_LARGE,
+                f"Request is too large (~{cost} tokens, limit {self.max_request_tokens}). "
+                f"Submit it as an async job under /jobs/ instead.",
+                cost,
+            )
+
+        self._take_quota(client, cost)
+        try:
+            self._acquire_inflight(cost, time.monotonic() + self.max_wait_seconds)
+        except AdmissionRejected:
+            self._refund_quota(client, cost)
+            raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight_tokens -= cost
+                self._inflight_requests -= 1
+                self._cond.notify_all()
+
+    def charge(self, client: str, cost: int):
+        """Charge an async job's tokens to the client's quota (jobs are not limited by size or in-flight tokens)"""
+        self._take_quota(client, cost)
+
+    def _take_quota(self, client: str, cost: int):
+        """Take `cost` from the client's bucket or reject at once (never blocks)"""
+        if self.client_rate <= 0:
+            return
+        with self._cond:
+            self._forget_idle_clients_locked()
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+            wait = bucket.wait_time(cost, time.monotonic())
+            if wait <= 0:
+                bucket.take(cost)
+                return
+        self._reject(
+            REJECT_QUOTA,
+            f"Token quota exceeded for this client (~{cost} tokens requested, "
+            f"{int(self.client_rate * 60)} tokens/minute allowed). Retry in {wait:.0f}s.",
+            cost,
+            retry_after=wait,
+        )
+
+    def _refund_quota(self, client: str, cost: int):
+        if self.client_rate <= 0:
+            return
+        with self._cond:
+            bucket = self._buckets.get(client)
+            if bucket is not None:
+                bucket.refund(cost)
+            self._cond.notify_all()
+
+    def _acquire_inflight(self, cost: int, deadline: float):
+        deferred = False
+        with self._cond:
+            while not self._fits_locked(cost):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                deferred = True
+                self._cond.wait(remaining)
+            else:
+                self._inflight_tokens += cost
+                self._inflight_requests += 1
+                self._admitted += 1
+                if deferred:
+                    self._deferred += 1
+                return
+        self._reject(
+            REJECT_OVERLOADED,
+            f"Server is busy ({self._inflight_tokens} tokens in flight, limit {self.max_inflight_tokens}). "
+            f"Retry shortly.",
+            cost,
+            retry_after=self.max_wait_seconds,
+        )
+
+    def _fits_locked(self, cost: int) -> bool:
+        if not self.max_inflight_tokens or self._inflight_requests == 0:
+            return True
+        return self._inflight_tokens + cost <= self.max_inflight_tokens
+
+    def _forget_idle_clients_locked(self):
+        """Drop buckets that have been full for a while (they would start full anyway)"""
+        if len(self._buckets) < 1024:
+            return
+        now = time.monotonic()
+        for client, bucket in list(self._buckets.items()):
+            if now - bucket.updated > self.idle_client_seconds:
+                del self._buckets[client]
+
+    def _reject(self, reason: str, message: str, cost: int, retry_after: Optional[float] = None):
+        with self._cond:
+            self._rejected[reason] += 1
+        raise AdmissionRejected(reason, message, cost, retry_after)
+
+    def is_idle(self) -> bool:
+        with self._cond:
+            return self._inflight_requests == 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "inflight_tokens": self._inflight_tokens,
+                "inflight_requests": self._inflight_requests,
+                "max_inflight_tokens": self.max_inflight_tokens,
+                "max_request_tokens": self.max_request_tokens,
+                "client_tokens_per_minute": int(self.client_rate * 60),
+                "client_burst_tokens": int(self.client_burst),
+                "clients": len(self._buckets),
+                "admitted": self._admitted,
+                "deferred": self._deferred,
+                "rejected": dict(self._rejected),
+            }
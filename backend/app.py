@@ -3,14 +3,29 @@ ABSOSUM - Answer Summarization Backend
 Step-by-step workflow for summarizing StackOverflow answers
 """
 
+import hmac
+import os
+import threading
 import warnings
 import time
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
+from model_registry import ModelRegistry
+from admission import AdmissionController, AdmissionRejected
+from job_store import JOB_QUEUED, JOB_RUNNING, JobCancelled, JobStore
+from dedup import group_near_duplicates
+from compiled_inference import DEFAULT_LENGTH_BUCKETS, compile_seq2seq, pad_to_bucket, parse_buckets, warm_up
+from pipeline import StagingBuffers, run_pipelined
+from prefetch import HotQuestions, PrefetchYield, Prefetcher
+from profiling import RequestProfiler, RequestTrace, STAGE_DETOKENIZATION, STAGE_TOKENIZATION, traced_generate
+from scheduler import InferenceScheduler, LANE_BULK, LANE_INTERACTIVE, estimate_generation_cost, generation_cost_from_lengths
+from summary_cache import SummaryCache, cache_key
 
 app = FastAPI(title="AbSOSUM - Answer Summarization API")
 
@@ -22,13 +37,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global model and tokenizer (will be loaded on demand)
-MODEL_NAME = "HuyTran1301/ABSOSUM_Phase1"
-model = None
-tokenizer = None
+# Phase 1 model (will be loaded on demand through the model registry)
+MODEL_NAME = os.environ.get("ABSOSUM_PHASE1_MODEL", "HuyTran1301/ABSOSUM_Phase1")
+MODEL_VERSION = os.environ.get("ABSOSUM_PHASE1_VERSION", "main")
 model_loaded = False
 model_error = None
 
+# Registry aliases for the two model roles
+PHASE1_ALIAS = "phase1"
+PHASE2_ALIAS = "phase2"
+
+# Resident-model RAM budget (MB, 0 = unlimited) and idle eviction TTL (seconds, 0 = never)
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("ABSOSUM_MODEL_MEMORY_BUDGET_MB", "0"))
+MODEL_IDLE_TTL_SECONDS = float(os.environ.get("ABSOSUM_MODEL_IDLE_TTL_SECONDS", "0"))
+
+# POST /models/swap needs the ADMIN_TOKEN_HEADER to match ADMIN_TOKEN (unset = swapping disabled).
+# Besides the configured models, only repos in SWAP_ALLOWED_MODELS (comma-separated) can be loaded.
+ADMIN_TOKEN = os.environ.get("ABSOSUM_ADMIN_TOKEN", "")
+ADMIN_TOKEN_HEADER = "X-AbSOSUM-Admin-Token"
+SWAP_ALLOWED_MODELS = {m.strip() for m in os.environ.get("ABSOSUM_SWAP_ALLOWED_MODELS", "").split(",") if m.strip()}
+
+# Generation settings (greedy for Phase 1, beam search for Phase 2)
+PHASE1_GENERATE_KWARGS = {"max_length": 80, "min_length": 20, "num_beams": 1, "do_sample": False}
+PHASE2_GENERATE_KWARGS = {"max_length": 100, "min_length": 30, "num_beams": 4, "do_sample": False, "early_stopping": True}
+
+# Inference scheduling: interactive vs bulk lanes served by weighted fair queuing.
+# Batch requests estimated below INTERACTIVE_MAX_TOKENS run on the interactive lane.
+INFERENCE_WORKERS = int(os.environ.get("ABSOSUM_INFERENCE_WORKERS", "1"))
+INTERACTIVE_LANE_WEIGHT = int(os.environ.get("ABSOSUM_INTERACTIVE_LANE_WEIGHT", "4"))
+BULK_LANE_WEIGHT = int(os.environ.get("ABSOSUM_BULK_LANE_WEIGHT", "1"))
+INTERACTIVE_MAX_TOKENS = int(os.environ.get("ABSOSUM_INTERACTIVE_MAX_TOKENS", "1024"))
+
+# Helper threads that tokenize / decode neighbouring batches while a batch is generating
+PIPELINE_HELPER_THREADS = int(os.environ.get("ABSOSUM_PIPELINE_HELPER_THREADS", "2"))
+
+# Phase 1 batch size (smaller batch for CPU, larger for GPU)
+PHASE1_BATCH_SIZE = 8 if torch.cuda.is_available() else 2
+
+# Compiled inference (opt-in): "off" = eager PyTorch, "compile" = torch.compile of the
+# encoder and decoder step, with inputs padded to LENGTH_BUCKETS so graphs are reused
+COMPILE_MODE = os.environ.get("ABSOSUM_COMPILE_MODE", "off").lower()
+LENGTH_BUCKETS = parse_buckets(os.environ.get("ABSOSUM_LENGTH_BUCKETS", ",".join(map(str, DEFAULT_LENGTH_BUCKETS))))
+
+# Per-process summary caches (entries, 0 = disabled), keyed by model version + input text.
+# The router (router.py) keeps each thread on one replica so these stay warm.
+SUMMARY_CACHE_SIZE = int(os.environ.get("ABSOSUM_SUMMARY_CACHE_SIZE", "10000"))
+UNIFIED_CACHE_SIZE = int(os.environ.get("ABSOSUM_UNIFIED_CACHE_SIZE", "1000"))
+
+# Near-duplicate answers (estimated Jaccard similarity of word shingles >= threshold) are
+# summarized once and merged into one Phase 2 input (0 = disabled)
+NEAR_DUP_THRESHOLD = float(os.environ.get("ABSOSUM_NEAR_DUP_THRESHOLD", "0.8"))
+
+# Request profiling: traces (stage timings + request shape) of requests sent with
+# "profile": true and of requests slower than SLOW_REQUEST_SECONDS (0 = off) go to PROFILE_DIR.
+# PROFILE_SAMPLE_RATE of all requests also run under the torch profiler (kept if slow).
+PROFILE_DIR = os.environ.get("ABSOSUM_PROFILE_DIR", "profiles")
+SLOW_REQUEST_SECONDS = float(os.environ.get("ABSOSUM_SLOW_REQUEST_SECONDS", "30"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("ABSOSUM_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_TRACES = int(os.environ.get("ABSOSUM_PROFILE_MAX_TRACES", "200"))
+
+# Admission control by estimated token cost (0 = no limit). Clients are identified by
+# peer address, or by CLIENT_ID_HEADER when set (only behind a proxy that sets it, e.g. router.py).
+CLIENT_TOKENS_PER_MINUTE = int(os.environ.get("ABSOSUM_CLIENT_TOKENS_PER_MINUTE", "60000"))
+CLIENT_BURST_TOKENS = int(os.environ.get("ABSOSUM_CLIENT_BURST_TOKENS", "40000"))
+MAX_INFLIGHT_TOKENS = int(os.environ.get("ABSOSUM_MAX_INFLIGHT_TOKENS", "60000"))
+MAX_REQUEST_TOKENS = int(os.environ.get("ABSOSUM_MAX_REQUEST_TOKENS", "40000"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get("ABSOSUM_ADMISSION_MAX_WAIT_SECONDS", "10"))
+CLIENT_ID_HEADER = os.environ.get("ABSOSUM_CLIENT_ID_HEADER", "")
+
+# Background prefetch: while idle, re-summarize the PREFETCH_TOP_N most requested questions
+# (requested at least PREFETCH_MIN_REQUESTS times) into the summary caches (0 = off)
+PREFETCH_TOP_N = int(os.environ.get("ABSOSUM_PREFETCH_TOP_N", "10"))
+PREFETCH_MIN_REQUESTS = int(os.environ.get("ABSOSUM_PREFETCH_MIN_REQUESTS", "2"))
+PREFETCH_INTERVAL_SECONDS = float(os.environ.get("ABSOSUM_PREFETCH_INTERVAL_SECONDS", "5"))
+PREFETCH_REFRESH_SECONDS = float(os.environ.get("ABSOSUM_PREFETCH_REFRESH_SECONDS", "900"))
+PREFETCH_HALF_LIFE_SECONDS = float(os.environ.get("ABSOSUM_PREFETCH_HALF_LIFE_SECONDS", "3600"))
+
 # =============================================================================
 # PHASE 2: Weight Calculation Utilities
 # =============================================================================
@@ -121,51 +205,126 @@ def compute_weights_for_question(answers: List[Dict[str, Any]]) -> List[Dict[str
     answers[acc_idx]["weight"] = preferred_weight
     return answers
 
-def load_model():
-    """Load Phase 1 model (Single-answer abstractive summarization) with CPU/GPU optimizations"""
-    global model, tokenizer, model_loaded, model_error
+def compile_batch_sizes(alias: str) -> List[int]:
+    """Batch sizes a model role generates with (Phase 2 summarizes one thread per call)"""
+    if alias == PHASE2_ALIAS:
+        return [1]
+    # Every Phase 1 batch size, partial last batches included
+    return list(range(1, PHASE1_BATCH_SIZE + 1))
+
+def load_seq2seq_model(name: str, version: str = "main", alias: str = PHASE1_ALIAS):
+    """Load a seq2seq model + tokenizer by name/version with CPU/GPU optimizations"""
+    print(f"📦 Loading model: {name}@{version}...")
+    tokenizer = AutoTokenizer.from_pretrained(name, revision=version)
     
-    if model_loaded:
-        return True
+    # Detect device
+    device = "cuda" if torch.cuda.is_available() else "cpu"
     
-    try:
-        print(f"📦 Loading Phase 1 model: {MODEL_NAME}...")
-        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        
-        # Detect device
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        if device == "cuda":
-            # GPU: Use FP16 for faster inference (2x speed)
-            model = AutoModelForSeq2SeqLM.from_pretrained(
-                MODEL_NAME,
-                torch_dtype=torch.float16,
-                low_cpu_mem_usage=True
-            )
-            print(f"✅ Phase 1 model loaded on {device} (FP16 - 2x FASTER)")
-        else:
-            # CPU: Optimize for inference
-            model = AutoModelForSeq2SeqLM.from_pretrained(
-                MODEL_NAME,
-                low_cpu_mem_usage=True
-            )
-            # Enable CPU optimizations
-            try:
-                if hasattr(torch.backends, 'mkldnn') and torch.backends.mkldnn.is_available():
-                    print("✅ Using MKL-DNN for CPU optimization")
-            except Exception as e:
-                print(f"⚠️ MKL-DNN check failed: {e}")
-            
-            print(f"✅ Phase 1 model loaded on {device} (CPU optimized)")
-        
-        model.to(device)
-        model.eval()  # Evaluation mode (disables dropout)
-        
-        # Disable gradient computation permanently
-        for param in model.parameters():
-            param.requires_grad = False
+    if device == "cuda":
+        # GPU: Use FP16 for faster inference (2x speed)
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            name,
+            revision=version,
+            torch_dtype=torch.float16,
+            low_cpu_mem_usage=True
+        )
+        print(f"✅ {name} loaded on {device} (FP16 - 2x FASTER)")
+    else:
+        # CPU: Optimize for inference
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            name,
+            revision=version,
+            low_cpu_mem_usage=True
+        )
+        # Enable CPU optimizations
+        try:
+            if hasattr(torch.backends, 'mkldnn') and torch.backends.mkldnn.is_available():
+                print("✅ Using MKL-DNN for CPU optimization")
+        except Exception as e:
+            print(f"⚠️ MKL-DNN check failed: {e}")
         
+        print(f"✅ {name} loaded on {device} (CPU optimized)")
+    
+    model.to(device)
+    model.eval()  # Evaluation mode (disables dropout)
+    
+    # Disable gradient computation permanently
+    for param in model.parameters():
+        param.requires_grad = False
+    
+    if COMPILE_MODE == "compile":
+        # Pre-compile every length bucket for every batch size this role runs
+        batch_sizes = compile_batch_sizes(alias)
+        print(f"🔥 Compiling {name} for length buckets {LENGTH_BUCKETS}, batch sizes {batch_sizes}...")
+        compile_seq2seq(model, expected_graphs=len(LENGTH_BUCKETS) * len(batch_sizes))
+        warm_up(
+            model,
+            tokenizer,
+            LENGTH_BUCKETS,
+            batch_sizes,
+            {"max_length": 4, "min_length": 0, "num_beams": 1, "do_sample": False}
+        )
+    
+    return model, tokenizer
+
+def release_device_memory():
+    """Hand freed CUDA blocks back to the driver after a model is unloaded"""
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+model_registry = ModelRegistry(
+    load_seq2seq_model,
+    memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+    idle_ttl_seconds=MODEL_IDLE_TTL_SECONDS,
+    on_unload=release_device_memory,
+)
+model_registry.start_reaper()
+
+inference_scheduler = InferenceScheduler(
+    {LANE_INTERACTIVE: INTERACTIVE_LANE_WEIGHT, LANE_BULK: BULK_LANE_WEIGHT},
+    workers=INFERENCE_WORKERS,
+)
+
+pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_HELPER_THREADS, thread_name_prefix="absosum-pipeline")
+
+summary_cache = SummaryCache(SUMMARY_CACHE_SIZE)
+unified_cache = SummaryCache(UNIFIED_CACHE_SIZE)
+
+admission_control = AdmissionController(
+    client_tokens_per_minute=CLIENT_TOKENS_PER_MINUTE,
+    client_burst_tokens=CLIENT_BURST_TOKENS,
+    max_inflight_tokens=MAX_INFLIGHT_TOKENS,
+    max_request_tokens=MAX_REQUEST_TOKENS,
+    max_wait_seconds=ADMISSION_MAX_WAIT_SECONDS,
+)
+
+request_profiler = RequestProfiler(
+    PROFILE_DIR,
+    slow_threshold_seconds=SLOW_REQUEST_SECONDS,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    max_traces=PROFILE_MAX_TRACES,
+)
+
+def bucket_inputs(inputs: Dict[str, Any], tokenizer) -> Dict[str, Any]:
+    """In compiled mode, pad tokenized inputs to a length bucket so a warm graph is reused"""
+    if COMPILE_MODE != "compile":
+        return inputs
+    return pad_to_bucket(inputs, LENGTH_BUCKETS, tokenizer.pad_token_id or 0)
+
+def inference_lane_for(cost_tokens: int) -> str:
+    """Pick the scheduler lane for a request from its estimated token cost"""
+    return LANE_INTERACTIVE if cost_tokens <= INTERACTIVE_MAX_TOKENS else LANE_BULK
+
+def load_model():
+    """Load Phase 1 model (Single-answer abstractive summarization) through the model registry"""
+    global model_loaded, model_error
+    
+    try:
+        if not model_registry.is_registered(PHASE1_ALIAS):
+            model_registry.register(PHASE1_ALIAS, MODEL_NAME, MODEL_VERSION)
+        model_registry.ensure_loaded(PHASE1_ALIAS)
         model_loaded = True
+        model_error = None
         return True
     except Exception as e:
         model_error = str(e)
@@ -173,49 +332,22 @@ def load_model():
         return False
 
 def load_phase2_model():
-    """Load Phase 2 model (Multi-answer abstractive summarization) with CPU/GPU optimizations"""
-    global phase2_model, phase2_tokenizer, phase2_model_loaded, phase2_model_error
-    
-    if phase2_model_loaded:
-        return True
+    """Load Phase 2 model (Multi-answer abstractive summarization) through the model registry"""
+    global phase2_model_loaded, phase2_model_error
     
     try:
-        print(f"📦 Loading Phase 2 model: {PHASE2_MODEL_NAME}...")
-        phase2_tokenizer = AutoTokenizer.from_pretrained(PHASE2_MODEL_NAME)
-        
-        # Detect device
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        if device == "cuda":
-            # GPU: Use FP16 for faster inference
-            phase2_model = AutoModelForSeq2SeqLM.from_pretrained(
-                PHASE2_MODEL_NAME,
-                torch_dtype=torch.float16,
-                low_cpu_mem_usage=True
-            )
-            print(f"✅ Phase 2 model loaded on {device} (FP16 - 2x FASTER)")
-        else:
-            # CPU: Optimize for inference
-            phase2_model = AutoModelForSeq2SeqLM.from_pretrained(
-                PHASE2_MODEL_NAME,
-                low_cpu_mem_usage=True
-            )
-            print(f"✅ Phase 2 model loaded on {device} (CPU optimized)")
-        
-        phase2_model.to(device)
-        phase2_model.eval()  # Evaluation mode (disables dropout)
-        
-        # Disable gradient computation permanently
-        for param in phase2_model.parameters():
-            param.requires_grad = False
-        
+        if not model_registry.is_registered(PHASE2_ALIAS):
+            model_registry.register(PHASE2_ALIAS, PHASE2_MODEL_NAME, PHASE2_MODEL_VERSION)
+        model_registry.ensure_loaded(PHASE2_ALIAS)
         phase2_model_loaded = True
+        phase2_model_error = None
         return True
     except Exception as e:
         phase2_model_error = str(e)
         print(f"❌ Failed to load Phase 2 model: {e}")
         return False
 
+
 class TestConnectionRequest(BaseModel):
     test: str = "test"
 
@@ -224,30 +356,113 @@ class ScrapeDataRequest(BaseModel):
     
 class AnswerSummarizeRequest(BaseModel):
     content: str = ""
+    profile: bool = False  # Write a profiling trace for this request
 
 class BatchSummarizeRequest(BaseModel):
     answers: List[Dict[str, Any]] = []
+    profile: bool = False  # Write a profiling trace for this request
 
 class UnifiedSummaryRequest(BaseModel):
     """Request for Phase 2 unified summary generation"""
     question_title: str
     answers: List[Dict[str, Any]] = []  # Must include 'summary' and 'weight' fields
+    profile: bool = False  # Write a profiling trace for this request
+
+class ThreadSummaryRequest(BaseModel):
+    """Request for an async job running STEP 3 (weights + summaries) and STEP 4 (unified summary)"""
+    question_title: str
+    answers: List[Dict[str, Any]] = []
+
+class ModelSwapRequest(BaseModel):
+    """Request to hot-swap the model behind a registry alias"""
+    alias: str  # "phase1" or "phase2"
+    name: Optional[str] = None  # Defaults to the alias' configured model; others must be in ABSOSUM_SWAP_ALLOWED_MODELS
+    version: str = "main"
 
 # =============================================================================
 # Global Phase 2 Model Variables
 # =============================================================================
 
 # Phase 2 Model for unified summarization
-PHASE2_MODEL_NAME = "HuyTran1301/ABSOSUM_Phase2_v1.0"
-phase2_model = None
-phase2_tokenizer = None
+PHASE2_MODEL_NAME = os.environ.get("ABSOSUM_PHASE2_MODEL", "HuyTran1301/ABSOSUM_Phase2_v1.0")
+PHASE2_MODEL_VERSION = os.environ.get("ABSOSUM_PHASE2_VERSION", "main")
 phase2_model_loaded = False
 phase2_model_error = None
 
+def current_model_spec(alias: str):
+    """(name, version) currently served for a registry alias"""
+    spec = model_registry.spec(alias)
+    if spec is not None:
+        return spec
+    if alias == PHASE2_ALIAS:
+        return PHASE2_MODEL_NAME, PHASE2_MODEL_VERSION
+    return MODEL_NAME, MODEL_VERSION
+
+# =============================================================================
+# ADMISSION CONTROL
+# =============================================================================
+
+def token_cost(alias: str, texts: List[str], generate_kwargs: Dict[str, Any]) -> int:
+    """
+    Token cost of generating from `texts` with an alias' model, measured with its
+    tokenizer when the model is resident (estimated from text length otherwise;
+    admission never loads anything on the request thread)
+    """
+    texts = [t for t in texts if t and t.strip()]
+    max_output_tokens = generate_kwargs["max_length"]
+    num_beams = generate_kwargs.get("num_beams", 1)
+    tokenizer = model_registry.resident_tokenizer(alias)
+    if tokenizer is None or not texts:
+        return estimate_generation_cost(texts, max_output_tokens=max_output_tokens, num_beams=num_beams)
+    # Same truncation / padding settings as inference, so the shared tokenizer is not reconfigured
+    attention_mask = tokenizer(texts, max_length=512, truncation=True, padding=True)["attention_mask"]
+    lengths = [sum(mask) for mask in attention_mask]
+    return generation_cost_from_lengths(lengths, max_output_tokens=max_output_tokens, num_beams=num_beams)
+
+def phase1_cost(answers: List[Dict[str, Any]]) -> int:
+    return token_cost(PHASE1_ALIAS, [a.get("content", "") for a in answers], PHASE1_GENERATE_KWARGS)
+
+def phase2_cost(question_title: str, answers: List[Dict[str, Any]]) -> int:
+    summaries = [a.get("summary") or "" for a in answers if a.get("duplicate_of") is None]
+    return token_cost(PHASE2_ALIAS, [" ".join([question_title] + summaries)], PHASE2_GENERATE_KWARGS)
+
+def client_id(http_request: Request) -> str:
+    if CLIENT_ID_HEADER and http_request.headers.get(CLIENT_ID_HEADER):
+        return http_request.headers[CLIENT_ID_HEADER]
+    return http_request.client.host if http_request.client else "unknown"
+
+@app.exception_handler(AdmissionRejected)
+def admission_rejected(request: Request, exc: AdmissionRejected):
+    print(f"🚫 Rejected {request.url.path} ({exc.reason}, ~{exc.cost} tokens): {exc.message}")
+    headers = {"Retry-After": str(int(exc.retry_after + 1))} if exc.retry_after is not None else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers=headers,
+        content={
+            "success": False,
+            "error": exc.message,
+            "reason": exc.reason,
+            "estimated_tokens": exc.cost,
+            "retry_after": round(exc.retry_after, 1) if exc.retry_after is not None else None
+        }
+    )
+
+@app.get("/admission")
+def admission_status():
+    """In-flight tokens, quotas and admission counters"""
+    return {"success": True, **admission_control.snapshot()}
+
 # =============================================================================
 # STEP 1: Test Connection
 # =============================================================================
 
+@app.on_event("startup")
+def precompile_models():
+    """In compiled mode, load and warm up both models before serving traffic"""
+    if COMPILE_MODE == "compile":
+        load_model()
+        load_phase2_model()
+
 @app.get("/")
 def root():
     """Root endpoint - API status"""
@@ -255,7 +470,7 @@ def root():
         "status": "online",
         "service": "ABSOSUM Answer Summarization",
         "version": "1.0.0",
-        "model": MODEL_NAME,
+        "model": current_model_spec(PHASE1_ALIAS)[0],
         "model_loaded": model_loaded
     }
 
@@ -272,6 +487,8 @@ def test_connection(request: TestConnectionRequest):
     phase2_success = load_phase2_model()
     
     device = "cuda" if torch.cuda.is_available() else "cpu"
+    phase1_name, phase1_version = current_model_spec(PHASE1_ALIAS)
+    phase2_name, phase2_version = current_model_spec(PHASE2_ALIAS)
     
     # Determine overall status
     all_success = phase1_success and phase2_success
@@ -281,13 +498,15 @@ def test_connection(request: TestConnectionRequest):
         "message": "Both models loaded successfully!" if all_success else "Some models failed to load",
         "device": device,
         "phase1_model": {
-            "name": MODEL_NAME,
+            "name": phase1_name,
+            "version": phase1_version,
             "loaded": model_loaded,
             "device": device if model_loaded else None,
             "error": model_error if not phase1_success else None
         },
         "phase2_model": {
-            "name": PHASE2_MODEL_NAME,
+            "name": phase2_name,
+            "version": phase2_version,
             "loaded": phase2_model_loaded,
             "device": device if phase2_model_loaded else None,
             "error": phase2_model_error if not phase2_success else None
@@ -296,6 +515,97 @@ def test_connection(request: TestConnectionRequest):
     
     return response
 
+# =============================================================================
+# Model Management: resident models, eviction and hot-swap
+# =============================================================================
+
+@app.get("/models")
+def list_models():
+    """List registry aliases, resident models and their memory usage"""
+    return {
+        "success": True,
+        **model_registry.snapshot()
+    }
+
+def admin_denied(http_request: Request) -> Optional[JSONResponse]:
+    """403 unless the request carries the admin token"""
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"success": False, "error": "Model swapping is disabled (set ABSOSUM_ADMIN_TOKEN)"})
+    token = http_request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return JSONResponse(status_code=403, content={"success": False, "error": "Invalid admin token"})
+    return None
+
+@app.post("/models/swap")
+def swap_model(request: ModelSwapRequest, http_request: Request):
+    """
+    Hot-swap the model version behind an alias without restarting.
+    In-flight requests finish on the previous version, which is unloaded afterwards.
+    """
+    global model_loaded, phase2_model_loaded
+    
+    denied = admin_denied(http_request)
+    if denied is not None:
+        return denied
+    
+    if request.alias not in (PHASE1_ALIAS, PHASE2_ALIAS):
+        return {
+            "success": False,
+            "error": f"Unknown model alias '{request.alias}'. Use '{PHASE1_ALIAS}' or '{PHASE2_ALIAS}'."
+        }
+    
+    configured_name = PHASE2_MODEL_NAME if request.alias == PHASE2_ALIAS else MODEL_NAME
+    name = request.name or configured_name
+    if name != configured_name and name not in SWAP_ALLOWED_MODELS:
+        return JSONResponse(status_code=403, content={
+            "success": False,
+            "error": f"Model '{name}' is not allowed. Add it to ABSOSUM_SWAP_ALLOWED_MODELS."
+        })
+    
+    time_start = time.time()
+    
+    try:
+        model_registry.swap(request.alias, name, request.version)
+    except Exception as e:
+        print(f"❌ Failed to swap {request.alias} to {name}@{request.version}: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "processing_time": round(time.time() - time_start, 2)
+        }
+    
+    if request.alias == PHASE1_ALIAS:
+        model_loaded = True
+    else:
+        phase2_model_loaded = True
+    
+    print(f"🔁 {request.alias} now serving {name}@{request.version}")
+    return {
+        "success": True,
+        "alias": request.alias,
+        "name": name,
+        "version": request.version,
+        "processing_time": round(time.time() - time_start, 2)
+    }
+
+@app.get("/scheduler")
+def scheduler_status():
+    """Queue depth and wait times of the interactive and bulk inference lanes"""
+    return {
+        "success": True,
+        "interactive_max_tokens": INTERACTIVE_MAX_TOKENS,
+        **inference_scheduler.snapshot()
+    }
+
+@app.get("/cache")
+def cache_status():
+    """Hit rates of the Phase 1 answer-summary cache and the Phase 2 unified-summary cache"""
+    return {
+        "success": True,
+        "summaries": summary_cache.snapshot(),
+        "unified": unified_cache.snapshot()
+    }
+
 # =============================================================================
 # STEP 2: Scan/Validate Data
 # =============================================================================
@@ -334,6 +644,8 @@ def validate_scraped_data(data: Dict[str, Any]):
                     warnings_list.append(f"Answer #{idx+1}: Empty content")
     
     is_valid = len(issues) == 0
+    if is_valid:
+        hot_questions.record(data["question"]["title"], data["answers"])
     
     return {
         "success": is_valid,
@@ -349,12 +661,155 @@ def validate_scraped_data(data: Dict[str, Any]):
 # STEP 3: Summarize Answers
 # =============================================================================
 
+def summarize_answers_in_batches(
+    answers: List[Dict[str, Any]],
+    progress: Optional[Callable[[int, int], None]] = None,
+    trace: Optional[RequestTrace] = None
+):
+    """
+    Summarize answers with the Phase 1 model in batches.
+    Answers already in the summary cache are not regenerated.
+    Each batch's generate() call is queued on the inference scheduler, so
+    interactive requests can run between the batches of a large thread.
+    Tokenization of the next batch and decoding of the previous batch run on
+    pipeline helper threads while the current batch is generating.
+    `progress(done, total)` is called after every batch (async jobs use it to
+    record progress and to stop on cancellation). Stage timings go to `trace`.
+    
+    Returns (summarized_answers, success_count, failed_count).
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(answers)
+    trace = trace or RequestTrace("summarizeBatch")
+    success_count = 0
+    failed_count = 0
+    done_count = 0
+    cached_count = 0
+    
+    # Batch processing for speed (smaller batch for CPU, larger for GPU)
+    BATCH_SIZE = PHASE1_BATCH_SIZE
+    contents = [ans.get("content", "") for ans in answers]
+    
+    with model_registry.acquire(PHASE1_ALIAS) as lease:
+        model, tokenizer = lease.model, lease.tokenizer
+        device = next(model.parameters()).device
+        
+        # Empty content is skipped, cached summaries are reused; the rest is generated
+        pending = []
+        for i, (ans, content) in enumerate(zip(answers, contents)):
+            if not content or not content.strip():
+                results[i] = {**ans, "summary": "", "summary_status": "empty_content"}
+                done_count += 1
+                continue
+            cached = summary_cache.get(cache_key(lease.name, lease.version, content))
+            if cached is not None:
+                results[i] = {**ans, "summary": cached, "summary_status": "success"}
+                success_count += 1
+                done_count += 1
+                cached_count += 1
+                continue
+            pending.append(i)
+        
+        batches = [
+            {
+                "number": batch_start // BATCH_SIZE + 1,
+                "indices": pending[batch_start:batch_start + BATCH_SIZE],
+                "contents": [contents[i] for i in pending[batch_start:batch_start + BATCH_SIZE]]
+            }
+            for batch_start in range(0, len(pending), BATCH_SIZE)
+        ]
+        
+        # Small threads are as cheap as a single answer -> keep them interactive
+        lane = inference_lane_for(estimate_generation_cost(
+            [contents[i] for i in pending],
+            max_output_tokens=PHASE1_GENERATE_KWARGS["max_length"]
+        ))
+        
+        staging = StagingBuffers(device)
+        # Tokenize/decode share one tokenizer across helper threads
+        tokenizer_lock = threading.Lock()
+        
+        def tokenize(batch):
+            # Batch tokenization
+            with tokenizer_lock, trace.stage(STAGE_TOKENIZATION):
+                inputs = tokenizer(
+                    batch["contents"],
+                    return_tensors="pt",
+                    max_length=512,
+                    truncation=True,
+                    padding=True
+                )
+            inputs = bucket_inputs(dict(inputs), tokenizer)
+            return staging.to_device(inputs, slot=batch["number"]), batch
+        
+        def generate(tokenized):
+            inputs, batch = tokenized
+            # Batch generation (GREEDY - FASTEST!)
+            cost = estimate_generation_cost(batch["contents"], max_output_tokens=PHASE1_GENERATE_KWARGS["max_length"])
+            return inference_scheduler.run(
+                lane, cost, traced_generate, model, inputs, trace, **PHASE1_GENERATE_KWARGS
+            )
+        
+        def decode(outputs):
+            # Decode summaries (one batch_decode call per batch)
+            with tokenizer_lock, trace.stage(STAGE_DETOKENIZATION):
+                return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        
+        def on_done(index, summaries, error):
+            nonlocal success_count, failed_count, done_count
+            batch = batches[index]
+            
+            if error is not None:
+                print(f"❌ Batch {batch['number']} failed: {str(error)}")
+                for i in batch["indices"]:
+                    results[i] = {
+                        **answers[i],
+                        "summary": "",
+                        "summary_status": "failed",
+                        "summary_error": str(error)
+                    }
+                    failed_count += 1
+            else:
+                # Map back to original answers
+                for i, summary in zip(batch["indices"], summaries):
+                    results[i] = {**answers[i], "summary": summary, "summary_status": "success"}
+                    summary_cache.put(cache_key(lease.name, lease.version, contents[i]), summary)
+                    success_count += 1
+                print(f"✅ Batch {batch['number']}: Summarized {len(batch['indices'])} answers")
+            
+            done_count += len(batch["indices"])
+            if progress is not None:
+                progress(done_count, len(answers))
+        
+        if not batches and progress is not None:
+            progress(done_count, len(answers))
+        run_pipelined(batches, tokenize, generate, decode, on_done, pipeline_executor)
+    
+    if cached_count:
+        print(f"💾 Summary cache: reused {cached_count} of {len(answers)} summaries")
+    return results, success_count, failed_count
+
 @app.post("/step3/summarizeAnswer")
-def summarize_single_answer(request: AnswerSummarizeRequest):
+def summarize_single_answer(request: AnswerSummarizeRequest, http_request: Request):
     """
     STEP 3a: Summarize Single Answer
     Generate summary for one answer
     """
+    if not model_loaded:
+        return {
+            "success": False,
+            "error": "Model not loaded. Please run STEP 1 first.",
+            "summary": "",
+            "processing_time": 0
+        }
+    
+    cost = token_cost(PHASE1_ALIAS, [request.content], PHASE1_GENERATE_KWARGS)
+    with admission_control.admit(client_id(http_request), cost):
+        trace = request_profiler.start("summarizeAnswer", request.profile)
+        trace.answer_count = 1
+        return request_profiler.finish(trace, summarize_single(request.content, trace))
+
+def summarize_single(content: str, trace: RequestTrace):
+    """Body of STEP 3a"""
     time_start = time.time()
     
     if not model_loaded:
@@ -366,8 +821,6 @@ def summarize_single_answer(request: AnswerSummarizeRequest):
         }
     
     try:
-        content = request.content
-        
         if not content or len(content.strip()) == 0:
             return {
                 "success": False,
@@ -376,22 +829,30 @@ def summarize_single_answer(request: AnswerSummarizeRequest):
                 "processing_time": 0
             }
         
-        # Tokenize
-        inputs = tokenizer(content, return_tensors="pt", max_length=512, truncation=True)
-        device = next(model.parameters()).device
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        # Generate summary (greedy decoding - fastest)
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_length=80,
-                min_length=20,
-                num_beams=1,
-                do_sample=False
-            )
-        
-        summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        # Borrow the Phase 1 model from the registry (reloaded if it was evicted)
+        with model_registry.acquire(PHASE1_ALIAS) as lease:
+            model, tokenizer = lease.model, lease.tokenizer
+            
+            key = cache_key(lease.name, lease.version, content)
+            summary = summary_cache.get(key)
+            
+            if summary is None:
+                # Tokenize
+                with trace.stage(STAGE_TOKENIZATION):
+                    inputs = tokenizer(content, return_tensors="pt", max_length=512, truncation=True)
+                inputs = bucket_inputs(dict(inputs), tokenizer)
+                device = next(model.parameters()).device
+                inputs = {k: v.to(device) for k, v in inputs.items()}
+                
+                # Generate summary (greedy decoding - fastest) on the interactive lane
+                cost = estimate_generation_cost([content], max_output_tokens=PHASE1_GENERATE_KWARGS["max_length"])
+                outputs = inference_scheduler.run(
+                    LANE_INTERACTIVE, cost, traced_generate, model, inputs, trace, **PHASE1_GENERATE_KWARGS
+                )
+                
+                with trace.stage(STAGE_DETOKENIZATION):
+                    summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
+                summary_cache.put(key, summary)
         
         time_end = time.time()
         
@@ -412,7 +873,7 @@ def summarize_single_answer(request: AnswerSummarizeRequest):
         }
 
 @app.post("/step3/summarizeBatch")
-def summarize_batch_answers(request: BatchSummarizeRequest):
+def summarize_batch_answers(request: BatchSummarizeRequest, http_request: Request):
     """
     STEP 3b: Summarize Batch of Answers
     Generate summaries for multiple answers
@@ -430,99 +891,21 @@ def summarize_batch_answers(request: BatchSummarizeRequest):
             "processing_time": 0
         }
     
-    summarized_answers = []
-    success_count = 0
-    failed_count = 0
-    
-    device = next(model.parameters()).device
-    
-    # Batch processing for speed (smaller batch for CPU, larger for GPU)
-    BATCH_SIZE = 8 if torch.cuda.is_available() else 2
-    contents = [ans.get("content", "") for ans in request.answers]
-    
-    for batch_start in range(0, len(request.answers), BATCH_SIZE):
-        batch_end = min(batch_start + BATCH_SIZE, len(request.answers))
-        batch_answers = request.answers[batch_start:batch_end]
-        batch_contents = contents[batch_start:batch_end]
-        
-        # Filter empty content
-        valid_indices = [i for i, c in enumerate(batch_contents) if c and c.strip()]
-        valid_contents = [batch_contents[i] for i in valid_indices]
-        
-        if not valid_contents:
-            for ans in batch_answers:
-                summarized_answers.append({
-                    **ans,
-                    "summary": "",
-                    "summary_status": "empty_content"
-                })
-            continue
+    with admission_control.admit(client_id(http_request), phase1_cost(request.answers)):
+        trace = request_profiler.start("summarizeBatch", request.profile)
+        trace.answer_count = len(request.answers)
+        summarized_answers, success_count, failed_count = summarize_answers_in_batches(request.answers, trace=trace)
         
-        try:
-            # Batch tokenization
-            inputs = tokenizer(
-                valid_contents,
-                return_tensors="pt",
-                max_length=512,
-                truncation=True,
-                padding=True
-            )
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-            
-            # Batch generation (GREEDY - FASTEST!)
-            with torch.no_grad():
-                outputs = model.generate(
-                    **inputs,
-                    max_length=80,
-                    min_length=20,
-                    num_beams=1,
-                    do_sample=False
-                )
-            
-            # Decode summaries
-            summaries = [tokenizer.decode(out, skip_special_tokens=True) for out in outputs]
-            
-            # Map back to original answers
-            valid_idx = 0
-            for i, ans in enumerate(batch_answers):
-                if i in valid_indices:
-                    summarized_answers.append({
-                        **ans,
-                        "summary": summaries[valid_idx],
-                        "summary_status": "success"
-                    })
-                    success_count += 1
-                    valid_idx += 1
-                else:
-                    summarized_answers.append({
-                        **ans,
-                        "summary": "",
-                        "summary_status": "empty_content"
-                    })
-            
-            print(f"✅ Batch {batch_start//BATCH_SIZE + 1}: Summarized {len(valid_contents)} answers")
-            
-        except Exception as e:
-            print(f"❌ Batch {batch_start//BATCH_SIZE + 1} failed: {str(e)}")
-            for ans in batch_answers:
-                summarized_answers.append({
-                    **ans,
-                    "summary": "",
-                    "summary_status": "failed",
-                    "summary_error": str(e)
-                })
-                failed_count += 1
-    
-    time_end = time.time()
-    
-    return {
-        "success": True,
-        "answers": summarized_answers,
-        "total": len(request.answers),
-        "success_count": success_count,
-        "failed_count": failed_count,
-        "processing_time": round(time_end - time_start, 2)
-    }
+        time_end = time.time()
+        
+        return request_profiler.finish(trace, {
+            "success": True,
+            "answers": summarized_answers,
+            "total": len(request.answers),
+            "success_count": success_count,
+            "failed_count": failed_count,
+            "processing_time": round(time_end - time_start, 2)
+        })
 
 # =============================================================================
 # PHASE 2: Weight-Aware Summarization (Future Integration)
@@ -576,7 +959,7 @@ def calculate_weights_only(request: BatchSummarizeRequest):
         }
 
 @app.post("/step3_phase2/summarizeWithWeights")
-def summarize_with_weights(request: BatchSummarizeRequest):
+def summarize_with_weights(request: BatchSummarizeRequest, http_request: Request):
     """
     PHASE 2 - STEP 3b: Weight-Aware Summarization
     
@@ -590,6 +973,84 @@ def summarize_with_weights(request: BatchSummarizeRequest):
     - Weight information (for transparency)
     - Data ready for Phase 2 model when available
     """
+    if not model_loaded:
+        return {
+            "success": False,
+            "error": "Model not loaded. Please run STEP 1 first.",
+            "answers": [],
+            "total": 0,
+            "success_count": 0,
+            "failed_count": 0,
+            "processing_time": 0
+        }
+    
+    with admission_control.admit(client_id(http_request), phase1_cost(request.answers)):
+        trace = request_profiler.start("summarizeWithWeights", request.profile)
+        trace.answer_count = len(request.answers)
+        return request_profiler.finish(trace, weighted_summarize(request.answers, trace=trace))
+
+def merge_near_duplicates(answers: List[Dict[str, Any]]):
+    """
+    Group near-duplicate answers (after weights are computed).
+    Each group is represented by its highest-weight answer, which takes the
+    sum of the group's weights. Returns (representatives, groups) where
+    groups[k] lists the answer indices of representatives[k]'s group,
+    representative first.
+    """
+    if NEAR_DUP_THRESHOLD <= 0:
+        groups = [[i] for i in range(len(answers))]
+    else:
+        groups = group_near_duplicates([a.get("content") or "" for a in answers], threshold=NEAR_DUP_THRESHOLD)
+    
+    representatives = []
+    ordered_groups = []
+    for group in groups:
+        rep_idx = max(group, key=lambda i: answers[i].get("weight", 0.0))
+        others = [i for i in group if i != rep_idx]
+        representative = dict(answers[rep_idx])
+        if others:
+            representative["original_weight"] = representative.get("weight", 0.0)
+            representative["weight"] = sum(answers[i].get("weight", 0.0) for i in group)
+            representative["duplicates"] = [answers[i].get("id", i) for i in others]
+        representatives.append(representative)
+        ordered_groups.append([rep_idx] + others)
+    return representatives, ordered_groups
+
+def expand_near_duplicates(
+    answers: List[Dict[str, Any]],
+    groups: List[List[int]],
+    summarized_representatives: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Back to one entry per original answer (original order). Duplicates reuse
+    their representative's summary, point to it with `duplicate_of` and carry
+    weight 0 (their weight was merged), so Phase 2 skips them.
+    """
+    expanded: List[Optional[Dict[str, Any]]] = [None] * len(answers)
+    for group, summarized in zip(groups, summarized_representatives):
+        rep_idx = group[0]
+        expanded[rep_idx] = summarized
+        for i in group[1:]:
+            expanded[i] = {
+                **answers[i],
+                "original_weight": answers[i].get("weight", 0.0),
+                "weight": 0.0,
+                "summary": summarized.get("summary", ""),
+                "summary_status": "duplicate" if summarized.get("summary_status") == "success" else summarized.get("summary_status"),
+                "duplicate_of": answers[rep_idx].get("id", rep_idx)
+            }
+    return expanded
+
+def weighted_summarize(
+    answers: List[Dict[str, Any]],
+    progress: Optional[Callable[[int, int], None]] = None,
+    trace: Optional[RequestTrace] = None
+):
+    """
+    Body of STEP 3b (weights + Phase 1 summaries), shared with async jobs.
+    `progress(done, total)` is called after every batch and may raise JobCancelled.
+    Stage timings go to `trace`.
+    """
     time_start = time.time()
     
     if not model_loaded:
@@ -606,96 +1067,32 @@ def summarize_with_weights(request: BatchSummarizeRequest):
     try:
         # STEP 1: Calculate weights
         print("📊 Calculating weights for answers...")
-        answers_with_weights = compute_weights_for_question([dict(ans) for ans in request.answers])
+        answers_with_weights = compute_weights_for_question([dict(ans) for ans in answers])
         print(f"✅ Weights calculated: {[round(a['weight'], 3) for a in answers_with_weights[:5]]}")
         
-        # STEP 2: Summarize each answer using Phase 1 model
-        print("🤖 Generating summaries with Phase 1 model...")
-        summarized_answers = []
-        success_count = 0
-        failed_count = 0
+        # STEP 2: Group near-duplicate answers; each group is summarized once
+        representatives, groups = merge_near_duplicates(answers_with_weights)
+        duplicate_count = len(answers_with_weights) - len(representatives)
+        if duplicate_count:
+            print(f"🧬 Merged {duplicate_count} near-duplicate answers into {sum(len(g) > 1 for g in groups)} groups")
         
-        device = next(model.parameters()).device
+        def group_progress(done: int, total: int):
+            progress(done + duplicate_count, total + duplicate_count)
         
-        # Batch processing for speed
-        BATCH_SIZE = 8 if torch.cuda.is_available() else 2
-        contents = [ans.get("content", "") for ans in answers_with_weights]
-        
-        for batch_start in range(0, len(answers_with_weights), BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, len(answers_with_weights))
-            batch_answers = answers_with_weights[batch_start:batch_end]
-            batch_contents = contents[batch_start:batch_end]
-            
-            # Filter empty content
-            valid_indices = [i for i, c in enumerate(batch_contents) if c and c.strip()]
-            valid_contents = [batch_contents[i] for i in valid_indices]
-            
-            if not valid_contents:
-                for ans in batch_answers:
-                    summarized_answers.append({
-                        **ans,
-                        "summary": "",
-                        "summary_status": "empty_content"
-                    })
-                continue
-            
-            try:
-                # Batch tokenization
-                inputs = tokenizer(
-                    valid_contents,
-                    return_tensors="pt",
-                    max_length=512,
-                    truncation=True,
-                    padding=True
-                )
-                inputs = {k: v.to(device) for k, v in inputs.items()}
-                
-                # Batch generation
-                with torch.no_grad():
-                    outputs = model.generate(
-                        **inputs,
-                        max_length=80,
-                        min_length=20,
-                        num_beams=1,
-                        do_sample=False
-                    )
-                
-                # Decode summaries
-                summaries = [tokenizer.decode(out, skip_special_tokens=True) for out in outputs]
-                
-                # Map back to original answers
-                valid_idx = 0
-                for i, ans in enumerate(batch_answers):
-                    if i in valid_indices:
-                        summarized_answers.append({
-                            **ans,
-                            "summary": summaries[valid_idx],
-                            "summary_status": "success"
-                        })
-                        success_count += 1
-                        valid_idx += 1
-                    else:
-                        summarized_answers.append({
-                            **ans,
-                            "summary": "",
-                            "summary_status": "empty_content"
-                        })
-                
-            except Exception as e:
-                print(f"❌ Batch failed: {str(e)}")
-                for ans in batch_answers:
-                    summarized_answers.append({
-                        **ans,
-                        "summary": "",
-                        "summary_status": "failed",
-                        "summary_error": str(e)
-                    })
-                    failed_count += 1
+        # STEP 3: Summarize each representative using Phase 1 model
+        print("🤖 Generating summaries with Phase 1 model...")
+        summarized_representatives, _, _ = summarize_answers_in_batches(
+            representatives, group_progress if progress is not None else None, trace
+        )
+        summarized_answers = expand_near_duplicates(answers_with_weights, groups, summarized_representatives)
+        success_count = sum(1 for a in summarized_answers if a["summary_status"] in ("success", "duplicate"))
+        failed_count = sum(1 for a in summarized_answers if a["summary_status"] == "failed")
         
         time_end = time.time()
         
-        # Calculate weight statistics
-        total_weight = sum(a.get("weight", 0.0) for a in summarized_answers)
+        # Calculate weight statistics (duplicates carry no weight of their own)
+        weighted_answers = [a for a in summarized_answers if a.get("duplicate_of") is None]
+        total_weight = sum(a.get("weight", 0.0) for a in weighted_answers)
         
         return {
             "success": True,
@@ -703,15 +1100,18 @@ def summarize_with_weights(request: BatchSummarizeRequest):
             "total": len(summarized_answers),
             "success_count": success_count,
             "failed_count": failed_count,
+            "duplicate_count": duplicate_count,
             "weight_stats": {
                 "total_weight": round(total_weight, 4),
-                "max_weight": round(max((a.get("weight", 0.0) for a in summarized_answers), default=0.0), 4),
-                "min_weight": round(min((a.get("weight", 0.0) for a in summarized_answers), default=0.0), 4),
-                "avg_weight": round(total_weight / len(summarized_answers), 4) if summarized_answers else 0.0
+                "max_weight": round(max((a.get("weight", 0.0) for a in weighted_answers), default=0.0), 4),
+                "min_weight": round(min((a.get("weight", 0.0) for a in weighted_answers), default=0.0), 4),
+                "avg_weight": round(total_weight / len(weighted_answers), 4) if weighted_answers else 0.0
             },
             "processing_time": round(time_end - time_start, 2)
         }
         
+    except (JobCancelled, PrefetchYield):
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -728,7 +1128,7 @@ def summarize_with_weights(request: BatchSummarizeRequest):
 # =============================================================================
 
 @app.post("/step4_phase2/generateUnifiedSummary")
-def generate_unified_summary(request: UnifiedSummaryRequest):
+def generate_unified_summary(request: UnifiedSummaryRequest, http_request: Request):
     """
     PHASE 2 - STEP 4: Generate Unified Summary
     
@@ -741,8 +1141,25 @@ def generate_unified_summary(request: UnifiedSummaryRequest):
     Weight-aware cross-attention mechanism uses weights to determine importance
     of each answer when generating the unified summary.
     """
-    global phase2_model, phase2_tokenizer, phase2_model_loaded, phase2_model_error
+    if not phase2_model_loaded:
+        return {
+            "success": False,
+            "error": "Phase 2 model not loaded. Please run STEP 1 first to load both models.",
+            "unified_summary": "",
+            "processing_time": 0
+        }
     
+    with admission_control.admit(client_id(http_request), phase2_cost(request.question_title, request.answers)):
+        return traced_unified_summary(request)
+
+def traced_unified_summary(request: UnifiedSummaryRequest):
+    """STEP 4 with request profiling (also used by async jobs)"""
+    trace = request_profiler.start("generateUnifiedSummary", request.profile)
+    trace.answer_count = len(request.answers)
+    return request_profiler.finish(trace, build_unified_summary(request, trace))
+
+def build_unified_summary(request: UnifiedSummaryRequest, trace: RequestTrace):
+    """Body of STEP 4"""
     time_start = time.time()
     
     # STEP 1: Check if Phase 2 model is loaded (should be loaded in STEP 1)
@@ -764,8 +1181,10 @@ def generate_unified_summary(request: UnifiedSummaryRequest):
         }
     
     # Filter answers that have summaries
+    # (near-duplicates were merged into their representative's weight in STEP 3)
     valid_answers = [ans for ans in request.answers 
-                     if ans.get("summary") and ans.get("summary").strip()]
+                     if ans.get("summary") and ans.get("summary").strip()
+                     and ans.get("duplicate_of") is None]
     
     if not valid_answers:
         return {
@@ -798,76 +1217,76 @@ def generate_unified_summary(request: UnifiedSummaryRequest):
         print(f"🔢 Number of answers: {len(valid_answers)}")
         print(f"⚖️  Weights: {[round(w, 3) for w in weights]}")
         
-        # STEP 4: Tokenize input
-        device = next(phase2_model.parameters()).device
-        
-        inputs = phase2_tokenizer(
-            input_sequence,
-            return_tensors="pt",
-            max_length=512,
-            truncation=True,
-            padding=True
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        # STEP 5: Create weight mask for cross-attention
-        # Based on Phase2_Inference_Only.ipynb technique
-        # The model's WeightAwareCrossAttention will use this mask
-        
-        # Apply log-scaling to weights (as in Phase2 training)
-        import math
-        log_weights = [math.log(w + 1e-8) for w in weights]
-        
-        # Normalize log-weights
-        max_log_weight = max(log_weights) if log_weights else 1.0
-        normalized_weights = [lw / max_log_weight if max_log_weight != 0 else 1.0 
-                             for lw in log_weights]
-        
-        # Create weight mask tensor
-        # Each token in an answer segment gets the same weight
-        input_ids = inputs["input_ids"][0]
-        weight_mask = torch.ones_like(input_ids, dtype=torch.float32)
-        
-        # Find token positions for each <ANS> segment
-        # This is approximate - in actual implementation, you'd need exact token positions
-        # For now, distribute weights evenly across the sequence
-        ans_token_count = len(input_ids) // (len(valid_answers) + 1)  # +1 for <POST>
-        
-        for i, norm_weight in enumerate(normalized_weights):
-            start_pos = (i + 1) * ans_token_count
-            end_pos = min(start_pos + ans_token_count, len(input_ids))
-            weight_mask[start_pos:end_pos] = norm_weight
-        
-        weight_mask = weight_mask.unsqueeze(0).to(device)
-        
-        # STEP 6: Generate unified summary
-        print("🤖 Generating unified summary with Phase 2 model...")
-        
-        with torch.no_grad():
-            # Note: The actual Phase 2 model should have weight_mask parameter
-            # If the model doesn't support it, we'll do standard generation
-            try:
-                outputs = phase2_model.generate(
-                    **inputs,
-                    max_length=100,
-                    min_length=30,
-                    num_beams=4,
-                    do_sample=False,
-                    early_stopping=True
+        # Borrow the Phase 2 model from the registry (reloaded if it was evicted)
+        with model_registry.acquire(PHASE2_ALIAS) as lease:
+            phase2_model, phase2_tokenizer = lease.model, lease.tokenizer
+            phase2_name = lease.name
+            unified_key = cache_key(lease.name, lease.version, input_sequence)
+            unified_summary = unified_cache.get(unified_key)
+            
+            # STEP 4: Tokenize input
+            device = next(phase2_model.parameters()).device
+            
+            with trace.stage(STAGE_TOKENIZATION):
+                inputs = phase2_tokenizer(
+                    input_sequence,
+                    return_tensors="pt",
+                    max_length=512,
+                    truncation=True,
+                    padding=True
                 )
-            except TypeError:
-                # Fallback if model doesn't support weight_mask in generate()
-                outputs = phase2_model.generate(
-                    **inputs,
-                    max_length=100,
-                    min_length=30,
-                    num_beams=4,
-                    do_sample=False,
-                    early_stopping=True
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            
+            # STEP 5: Create weight mask for cross-attention
+            # Based on Phase2_Inference_Only.ipynb technique
+            # The model's WeightAwareCrossAttention will use this mask
+            
+            # Apply log-scaling to weights (as in Phase2 training)
+            import math
+            log_weights = [math.log(w + 1e-8) for w in weights]
+            
+            # Normalize log-weights
+            max_log_weight = max(log_weights) if log_weights else 1.0
+            normalized_weights = [lw / max_log_weight if max_log_weight != 0 else 1.0 
+                                 for lw in log_weights]
+            
+            # Create weight mask tensor
+            # Each token in an answer segment gets the same weight
+            input_ids = inputs["input_ids"][0]
+            weight_mask = torch.ones_like(input_ids, dtype=torch.float32)
+            
+            # Find token positions for each <ANS> segment
+            # This is approximate - in actual implementation, you'd need exact token positions
+            # For now, distribute weights evenly across the sequence
+            ans_token_count = len(input_ids) // (len(valid_answers) + 1)  # +1 for <POST>
+            
+            for i, norm_weight in enumerate(normalized_weights):
+                start_pos = (i + 1) * ans_token_count
+                end_pos = min(start_pos + ans_token_count, len(input_ids))
+                weight_mask[start_pos:end_pos] = norm_weight
+            
+            weight_mask = weight_mask.unsqueeze(0).to(device)
+            
+            # STEP 6: Generate unified summary (unless this exact input was summarized before)
+            if unified_summary is None:
+                print("🤖 Generating unified summary with Phase 2 model...")
+                
+                # Note: The actual Phase 2 model should have weight_mask parameter
+                # Until it does, we do standard generation (on the interactive lane)
+                cost = estimate_generation_cost(
+                    [input_sequence],
+                    max_output_tokens=PHASE2_GENERATE_KWARGS["max_length"],
+                    num_beams=PHASE2_GENERATE_KWARGS["num_beams"]
                 )
-        
-        # STEP 7: Decode output
-        unified_summary = phase2_tokenizer.decode(outputs[0], skip_special_tokens=True)
+                outputs = inference_scheduler.run(
+                    LANE_INTERACTIVE, cost, traced_generate, phase2_model,
+                    bucket_inputs(inputs, phase2_tokenizer), trace, **PHASE2_GENERATE_KWARGS
+                )
+                
+                # STEP 7: Decode output
+                with trace.stage(STAGE_DETOKENIZATION):
+                    unified_summary = phase2_tokenizer.decode(outputs[0], skip_special_tokens=True)
+                unified_cache.put(unified_key, unified_summary)
         
         time_end = time.time()
         
@@ -876,7 +1295,7 @@ def generate_unified_summary(request: UnifiedSummaryRequest):
         return {
             "success": True,
             "unified_summary": unified_summary,
-            "model_name": PHASE2_MODEL_NAME,
+            "model_name": phase2_name,
             "num_answers_used": len(valid_answers),
             "weights": [round(w, 4) for w in weights],
             "normalized_weights": [round(nw, 4) for nw in normalized_weights],
@@ -895,6 +1314,206 @@ def generate_unified_summary(request: UnifiedSummaryRequest):
             "processing_time": 0
         }
 
+# =============================================================================
+# ASYNC JOBS: Submit / Poll / Cancel for very large threads
+# =============================================================================
+
+# Jobs run in the background, independent of the HTTP connection that submitted them.
+# Finished jobs (and their results) are kept for JOB_RESULT_TTL_SECONDS.
+JOB_DB_PATH = os.environ.get("ABSOSUM_JOB_DB_PATH", "jobs.sqlite3")
+JOB_RESULT_TTL_SECONDS = float(os.environ.get("ABSOSUM_JOB_RESULT_TTL_SECONDS", "3600"))
+JOB_WORKERS = int(os.environ.get("ABSOSUM_JOB_WORKERS", "2"))
+
+JOB_STAGE_SUMMARIZING = "summarizing_answers"
+JOB_STAGE_UNIFIED = "unified_summary"
+
+job_store = JobStore(JOB_DB_PATH, result_ttl_seconds=JOB_RESULT_TTL_SECONDS)
+interrupted_jobs = job_store.fail_interrupted()
+if interrupted_jobs:
+    print(f"⚠️ Marked {interrupted_jobs} job(s) from a previous run as interrupted")
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="absosum-job")
+# Jobs queued or running (they bypass admission, so the prefetcher checks this too)
+pending_jobs = 0
+pending_jobs_lock = threading.Lock()
+
+def run_job(job_id: str, kind: str, request: BaseModel):
+    """Execute one async job on a job worker and record its outcome in the job store"""
+    if job_store.is_cancel_requested(job_id):
+        job_store.mark_cancelled(job_id)
+        return
+    
+    def progress(done: int, total: int):
+        job_store.set_progress(job_id, JOB_STAGE_SUMMARIZING, done, total)
+        if job_store.is_cancel_requested(job_id):
+            raise JobCancelled()
+    
+    try:
+        if kind == "generateUnifiedSummary":
+            job_store.start(job_id, JOB_STAGE_UNIFIED)
+            result = traced_unified_summary(request)
+        else:
+            job_store.start(job_id, JOB_STAGE_SUMMARIZING)
+            result = weighted_summarize(request.answers, progress)
+            
+            if kind == "summarizeThread" and result["success"]:
+                if job_store.is_cancel_requested(job_id):
+                    raise JobCancelled()
+                job_store.set_progress(job_id, JOB_STAGE_UNIFIED, len(request.answers), len(request.answers))
+                unified = traced_unified_summary(UnifiedSummaryRequest(
+                    question_title=request.question_title,
+                    answers=result["answers"]
+                ))
+                result = {
+                    "success": unified["success"],
+                    "error": unified.get("error"),
+                    "step3": result,
+                    "step4": unified
+                }
+        
+        if result["success"]:
+            job_store.complete(job_id, result)
+            print(f"✅ Job {job_id} ({kind}) completed")
+        else:
+            job_store.fail(job_id, result.get("error") or "Job failed")
+            print(f"❌ Job {job_id} ({kind}) failed: {result.get('error')}")
+    
+    except JobCancelled:
+        job_store.mark_cancelled(job_id)
+        print(f"🛑 Job {job_id} ({kind}) cancelled")
+    except Exception as e:
+        job_store.fail(job_id, str(e))
+        print(f"❌ Job {job_id} ({kind}) failed: {e}")
+
+def run_counted_job(job_id: str, kind: str, request: BaseModel):
+    global pending_jobs
+    try:
+        run_job(job_id, kind, request)
+    finally:
+        with pending_jobs_lock:
+            pending_jobs -= 1
+
+def submit_job(kind: str, request: BaseModel, total: int):
+    """Persist a new job and queue it on the job workers"""
+    global pending_jobs
+    job_store.purge_expired()
+    job_id = job_store.create(kind, progress_total=total)
+    with pending_jobs_lock:
+        pending_jobs += 1
+    job_executor.submit(run_counted_job, job_id, kind, request)
+    print(f"📥 Job {job_id} ({kind}) queued with {total} answers")
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": JOB_QUEUED,
+        "poll_url": f"/jobs/{job_id}"
+    }
+
+@app.post("/jobs/summarizeWithWeights")
+def submit_summarize_with_weights_job(request: BatchSummarizeRequest, http_request: Request):
+    """Async version of STEP 3 (weights + Phase 1 summaries)"""
+    admission_control.charge(client_id(http_request), phase1_cost(request.answers))
+    return submit_job("summarizeWithWeights", request, len(request.answers))
+
+@app.post("/jobs/generateUnifiedSummary")
+def submit_unified_summary_job(request: UnifiedSummaryRequest, http_request: Request):
+    """Async version of STEP 4 (Phase 2 unified summary)"""
+    admission_control.charge(client_id(http_request), phase2_cost(request.question_title, request.answers))
+    return submit_job("generateUnifiedSummary", request, len(request.answers))
+
+@app.post("/jobs/summarizeThread")
+def submit_thread_job(request: ThreadSummaryRequest, http_request: Request):
+    """Async STEP 3 + STEP 4 for a whole thread in one job"""
+    hot_questions.record(request.question_title, request.answers)
+    # STEP 4 input is not known yet: assume full-length Phase 1 summaries
+    step4_cost = generation_cost_from_lengths(
+        [len(request.answers) * PHASE1_GENERATE_KWARGS["max_length"]],
+        max_output_tokens=PHASE2_GENERATE_KWARGS["max_length"],
+        num_beams=PHASE2_GENERATE_KWARGS["num_beams"]
+    )
+    admission_control.charge(client_id(http_request), phase1_cost(request.answers) + step4_cost)
+    return submit_job("summarizeThread", request, len(request.answers))
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Poll a job: status (queued/running/completed/failed/cancelled), current stage,
+    answers summarized so far and, once completed, the result.
+    """
+    job_store.purge_expired()
+    job = job_store.get(job_id)
+    if job is None:
+        return {
+            "success": False,
+            "error": "Job not found (unknown id or result expired)"
+        }
+    return {
+        "success": True,
+        **job
+    }
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Request cancellation; a running job stops after its current batch"""
+    status = job_store.request_cancel(job_id)
+    if status is None:
+        return {
+            "success": False,
+            "error": "Job not found (unknown id or result expired)"
+        }
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": status,
+        "cancel_requested": status in (JOB_QUEUED, JOB_RUNNING)
+    }
+
+# =============================================================================
+# BACKGROUND PREFETCH: Keep hot questions summarized
+# =============================================================================
+
+# Questions are counted when scraped data is validated (STEP 2) or submitted as a thread job
+hot_questions = HotQuestions(half_life_seconds=PREFETCH_HALF_LIFE_SECONDS)
+
+def no_live_traffic() -> bool:
+    """Nothing admitted, queued or generating for live requests, and no async job pending"""
+    with pending_jobs_lock:
+        if pending_jobs:
+            return False
+    return admission_control.is_idle() and inference_scheduler.is_idle()
+
+def prefetch_question(entry: Dict[str, Any]):
+    """STEP 3 + STEP 4 for a hot question; results land in the summary caches"""
+    def yield_to_live_traffic(done: int, total: int):
+        if not no_live_traffic():
+            raise PrefetchYield()
+    
+    step3 = weighted_summarize(entry["answers"], yield_to_live_traffic)
+    if not step3["success"]:
+        raise RuntimeError(step3.get("error"))
+    yield_to_live_traffic(0, 0)
+    step4 = traced_unified_summary(UnifiedSummaryRequest(question_title=entry["title"], answers=step3["answers"]))
+    if not step4["success"]:
+        raise RuntimeError(step4.get("error"))
+    print(f"🔥 Prefetched '{entry['title'][:60]}' ({len(entry['answers'])} answers)")
+
+prefetcher = Prefetcher(
+    hot_questions,
+    prefetch_question,
+    # Models are loaded by STEP 1; until then there is nothing to prefetch with
+    is_idle=lambda: model_loaded and phase2_model_loaded and no_live_traffic(),
+    top_n=PREFETCH_TOP_N,
+    min_requests=PREFETCH_MIN_REQUESTS,
+    interval_seconds=PREFETCH_INTERVAL_SECONDS,
+    refresh_seconds=PREFETCH_REFRESH_SECONDS,
+)
+if PREFETCH_TOP_N > 0:
+    prefetcher.start()
+
+@app.get("/prefetch")
+def prefetch_status():
+    """Hottest questions and whether their summaries are precomputed"""
+    return {"success": True, **prefetcher.snapshot()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,123 @@
+"""
+ABSOSUM - Compiled vs Eager Benchmark (CPU)
+Times Phase 1 style generation (greedy, max_length=80) per length bucket and
+batch size with eager PyTorch and with ABSOSUM_COMPILE_MODE=compile.
+
+Examples:
+    # Tiny stand-in model (no download), quick check
+    python bench_compiled.py
+
+    # Real Phase 1 model
+    python bench_compiled.py --model HuyTran1301/ABSOSUM_Phase1 --iterations 5 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from compiled_inference import DEFAULT_LENGTH_BUCKETS, compile_seq2seq, pad_to_bucket, parse_buckets, warm_up
+from tiny_models import build_tiny_model, synthetic_text
+
+GENERATE_KWARGS = {"max_length": 80, "min_length": 20, "num_beams": 1, "do_sample": False}
+
+
+def load_cpu_model(name: str):
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(name, low_cpu_mem_usage=True)
+    model.to("cpu")
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad = False
+    return model, tokenizer
+
+
+def make_inputs(tokenizer, bucket: int, batch_size: int, buckets: List[int], rng: random.Random):
+    """A batch whose longest input lands in `bucket` (same inputs for eager and compiled runs)"""
+    texts = [synthetic_text(rng, rng.randint(bucket // 2, bucket)) for _ in range(batch_size)]
+    inputs = tokenizer(texts, return_tensors="pt", max_length=bucket, truncation=True, padding=True)
+    return pad_to_bucket(dict(inputs), buckets, tokenizer.pad_token_id or 0)
+
+
+def time_generate(model, inputs: Dict[str, Any], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        with torch.no_grad():
+            model.generate(**inputs, **GENERATE_KWARGS)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled vs eager generation on CPU")
+    parser.add_argument("--model", default=None, help="Model name/path (default: tiny stand-in model)")
+    parser.add_argument("--buckets", default=",".join(map(str, DEFAULT_LENGTH_BUCKETS)))
+    parser.add_argument("--batch-sizes", default="1,2", help="Comma-separated batch sizes")
+    parser.add_argument("--iterations", type=int, default=10, help="Timed generate() calls per case")
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads()")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    buckets = parse_buckets(args.buckets)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    model_name = args.model or build_tiny_model(os.path.join(tempfile.gettempdir(), "absosum-tiny-phase1"))
+
+    print(f"📦 Loading {model_name} (eager + compiled copies, CPU, {torch.get_num_threads()} threads)...")
+    eager_model, tokenizer = load_cpu_model(model_name)
+    compiled_model, _ = load_cpu_model(model_name)
+
+    started = time.perf_counter()
+    compile_seq2seq(compiled_model, expected_graphs=len(buckets) * len(batch_sizes))
+    warm_up(compiled_model, tokenizer, buckets, batch_sizes, GENERATE_KWARGS)
+    compile_seconds = time.perf_counter() - started
+
+    results = []
+    print(f"\n{'bucket':>6} {'batch':>5} {'eager':>9} {'compiled':>9} {'speedup':>8} {'same':>5}")
+    for bucket in buckets:
+        for batch_size in batch_sizes:
+            inputs = make_inputs(tokenizer, bucket, batch_size, buckets, random.Random(args.seed + bucket + batch_size))
+            # One untimed eager run so both paths start warm
+            time_generate(eager_model, inputs, 1)
+            eager = statistics.median(time_generate(eager_model, inputs, args.iterations))
+            compiled = statistics.median(time_generate(compiled_model, inputs, args.iterations))
+            with torch.no_grad():
+                same = torch.equal(
+                    eager_model.generate(**inputs, **GENERATE_KWARGS),
+                    compiled_model.generate(**inputs, **GENERATE_KWARGS)
+                )
+            results.append({
+                "bucket": bucket,
+                "batch_size": batch_size,
+                "eager_seconds": round(eager, 4),
+                "compiled_seconds": round(compiled, 4),
+                "speedup": round(eager / compiled, 2) if compiled else 0.0,
+                "same_output": same
+            })
+            print(f"{bucket:>6} {batch_size:>5} {eager:>8.3f}s {compiled:>8.3f}s {eager / compiled:>7.2f}x {str(same):>5}")
+
+    print(f"\n🔥 Compile + warm-up time: {compile_seconds:.1f}s for {len(buckets) * len(batch_sizes)} graphs")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": model_name,
+                "threads": torch.get_num_threads(),
+                "iterations": args.iterations,
+                "compile_seconds": round(compile_seconds, 1),
+                "results": results
+            }, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+ABSOSUM - Near-Duplicate Answers
+Groups answers that are copies or small rewrites of each other ("same as
+above but with X") so only one answer per group is summarized and fed to
+Phase 2. Answers are compared by MinHash signatures of word shingles;
+locality-sensitive hashing (bands of the signature) finds candidate pairs
+without comparing every pair, and candidates are kept when their estimated
+Jaccard similarity reaches the threshold.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Code is replaced by this placeholder when scraping, so it says nothing about similarity
+CODE_PLACEHOLDER = "<code block>"
+
+_MERSENNE_PRIME = (1 << 32) - 5
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Lower-cased word `size`-grams of `text` (code placeholders removed)"""
+    words = _WORD.findall(text.replace(CODE_PLACEHOLDER, " ").lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash_signature(items: Sequence[str], num_perm: int = 64, seed: int = 1) -> np.ndarray:
+    """MinHash signature of a set of strings (`num_perm` universal hash functions)"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "big") for item in set(items)],
+        dtype=np.uint64,
+    )
+    if not len(hashes):
+        return np.full(num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+    # (num_items, num_perm) matrix of a*h + b mod p, minimised per hash function
+    return ((np.outer(hashes, a) + b) % _MERSENNE_PRIME).min(axis=0)
+
+
+def group_near_duplicates(
+    texts: Sequence[str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16,
+    min_words: int = 8,
+    shingle_size: int = 3,
+) -> List[List[int]]:
+    """
+    Group indices of `texts` whose estimated Jaccard similarity is >= `threshold`.
+
+    Returns every index exactly once; groups keep index order and singletons
+    are returned as one-element groups. Texts with fewer than `min_words`
+    words (outside code placeholders) are never grouped, since short
+    answers like "Try this: <code block>" can hide completely different code;
+    neither are missing (non-string) texts.
+    """
+    rows = num_perm // bands
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures: Dict[int, np.ndarray] = {}
+    for i, text in enumerate(texts):
+        if isinstance(text, str) and len(_WORD.findall(text.replace(CODE_PLACEHOLDER, " "))) >= min_words:
+            signatures[i] = minhash_signature(shingles(text, shingle_size), num_perm)
+
+    buckets: Dict[tuple, List[int]] = {}
+    for i, signature in signatures.items():
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if find(i) != find(j) and np.mean(signatures[i] == signatures[j]) >= threshold:
+                    parent[find(j)] = find(i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
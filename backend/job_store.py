@@ -0,0 +1,174 @@
+"""
+ABSOSUM - Job Store
+SQLite-backed store for asynchronous summarization jobs: status, progress and
+results, kept for a TTL after completion so clients can reconnect and poll.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested"""
+
+
+class JobStore:
+    """
+    Persistent job table. Every call opens its own short-lived connection, so
+    the store can be used from request threads and job workers alike.
+    """
+
+    def __init__(self, path: str, result_ttl_seconds: float = 3600):
+        self.path = path
+        self.result_ttl_seconds = result_ttl_seconds
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress_done INTEGER NOT NULL DEFAULT 0,
+                    progress_total INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    expires_at REAL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commit on success, rollback on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id: str, **fields) -> bool:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+            return cursor.rowcount > 0
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def create(self, kind: str, progress_total: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, progress_total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JOB_QUEUED, JOB_QUEUED, progress_total, now, now),
+            )
+        return job_id
+
+    def start(self, job_id: str, stage: str):
+        self._update(job_id, status=JOB_RUNNING, stage=stage)
+
+    def set_progress(self, job_id: str, stage: str, done: int, total: int):
+        self._update(job_id, stage=stage, progress_done=done, progress_total=total)
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        self._finish(job_id, JOB_COMPLETED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, JOB_FAILED, error=error)
+
+    def mark_cancelled(self, job_id: str):
+        self._finish(job_id, JOB_CANCELLED, error="Cancelled by client")
+
+    def _finish(self, job_id: str, status: str, **fields):
+        now = time.time()
+        self._update(
+            job_id,
+            status=status,
+            stage=status,
+            finished_at=now,
+            expires_at=now + self.result_ttl_seconds,
+            **fields,
+        )
+
+    # -------------------------------------------------------------------------
+    # Cancellation
+    # -------------------------------------------------------------------------
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Flag a job for cancellation; returns its status (None if unknown)"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job["status"] not in FINISHED_STATUSES:
+            self._update(job_id, cancel_requested=1)
+        return job["status"]
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    # -------------------------------------------------------------------------
+    # Queries / housekeeping
+    # -------------------------------------------------------------------------
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs whose result TTL has passed"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def fail_interrupted(self) -> int:
+        """Mark jobs left queued/running by a previous process as failed"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ?, finished_at = ?, expires_at = ? "
+                "WHERE status IN (?, ?)",
+                (
+                    JOB_FAILED, JOB_FAILED, "Interrupted by backend restart", now, now,
+                    now + self.result_ttl_seconds, JOB_QUEUED, JOB_RUNNING,
+                ),
+            )
+            return cursor.rowcount
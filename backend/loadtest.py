@@ -0,0 +1,410 @@
+"""
+ABSOSUM - Load & Soak Test Harness
+Replays extension sessions (testConnection -> validateData ->
+summarizeWithWeights -> generateUnifiedSummary) against a backend at a given
+concurrency and arrival rate, and reports latency percentiles per endpoint,
+error rates and backend memory growth.
+
+Examples:
+    # Start a local backend with tiny stand-in models and run for 10 minutes
+    python loadtest.py --start-backend --concurrency 8 --rate 2 --duration 600
+
+    # Hours-long soak against a running backend, replaying scraped threads
+    python loadtest.py --url http://localhost:8000 --sessions threads.jsonl \\
+        --duration 14400 --report-interval 300 --output soak.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from tiny_models import build_tiny_model, synthetic_text
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SESSION_STEPS = [
+    "/step1/testConnection",
+    "/step2/validateData",
+    "/step3_phase2/summarizeWithWeights",
+    "/step4_phase2/generateUnifiedSummary",
+]
+
+
+# =============================================================================
+# Sessions
+# =============================================================================
+
+def synthetic_thread(rng: random.Random) -> Dict[str, Any]:
+    """
+    A scraped thread shaped like the extension's payload. Answer counts follow
+    a long tail (most threads have a few answers, some have dozens).
+    """
+    n_answers = min(60, max(1, int(rng.paretovariate(1.2))))
+    answers = []
+    for i in range(n_answers):
+        content = synthetic_text(rng, rng.randint(10, 400))
+        answers.append({
+            "id": f"answer-{i}",
+            "votes": int(rng.expovariate(0.05)),
+            "is_accepted": i == 0 and rng.random() < 0.6,
+            "content": content,
+            "content_length": len(content)
+        })
+    return {
+        "question": {"title": synthetic_text(rng, rng.randint(5, 15))},
+        "answers": answers
+    }
+
+
+def load_threads(path: str) -> List[Dict[str, Any]]:
+    """Scraped threads to replay: one {question, answers} JSON object per line"""
+    threads = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                threads.append(json.loads(line))
+    return threads
+
+
+# =============================================================================
+# Statistics
+# =============================================================================
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def summary(self) -> Dict[str, Any]:
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "p50": round(percentile(self.latencies, 50), 3),
+            "p95": round(percentile(self.latencies, 95), 3),
+            "p99": round(percentile(self.latencies, 99), 3),
+            "max": round(max(self.latencies), 3) if self.latencies else 0.0,
+        }
+
+
+class LoadStats:
+    """Latencies per endpoint, for the whole run and for the current report window"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total: Dict[str, EndpointStats] = {}
+        self.window: Dict[str, EndpointStats] = {}
+        self.sessions_started = 0
+        self.sessions_completed = 0
+        self.sessions_dropped = 0
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self._lock:
+            for table in (self.total, self.window):
+                stats = table.setdefault(endpoint, EndpointStats())
+                stats.latencies.append(latency)
+                if not ok:
+                    stats.errors += 1
+
+    def session_completed(self):
+        with self._lock:
+            self.sessions_completed += 1
+
+    def take_window(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            window, self.window = self.window, {}
+        return {endpoint: stats.summary() for endpoint, stats in window.items()}
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {endpoint: stats.summary() for endpoint, stats in self.total.items()}
+
+
+class MemorySampler:
+    """Samples the backend's resident memory (RSS) from /proc at a fixed interval"""
+
+    def __init__(self, pid: Optional[int], interval: float):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[tuple] = []  # (elapsed seconds, rss MB)
+        self._stop = threading.Event()
+        self._started = time.time()
+
+    def rss_mb(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024.0
+        except OSError:
+            return None
+        return None
+
+    def start(self):
+        def _run():
+            while not self._stop.is_set():
+                rss = self.rss_mb()
+                if rss is not None:
+                    self.samples.append((time.time() - self._started, rss))
+                self._stop.wait(self.interval)
+        threading.Thread(target=_run, name="memory-sampler", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"available": False}
+        times = [t for t, _ in self.samples]
+        values = [v for _, v in self.samples]
+        # Least-squares slope -> MB per hour; a steady positive slope over a soak run hints at a leak
+        slope = 0.0
+        if len(self.samples) > 1:
+            mean_t = sum(times) / len(times)
+            mean_v = sum(values) / len(values)
+            var_t = sum((t - mean_t) ** 2 for t in times)
+            if var_t > 0:
+                slope = sum((t - mean_t) * (v - mean_v) for t, v in self.samples) / var_t
+        return {
+            "available": True,
+            "start_mb": round(values[0], 1),
+            "end_mb": round(values[-1], 1),
+            "max_mb": round(max(values), 1),
+            "growth_mb": round(values[-1] - values[0], 1),
+            "growth_mb_per_hour": round(slope * 3600, 2),
+            "samples": len(values),
+        }
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+def post_json(base_url: str, path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def response_ok(path: str, body: Dict[str, Any]) -> bool:
+    if path == "/step1/testConnection":
+        return body.get("status") == "success"
+    return bool(body.get("success"))
+
+
+def run_session(base_url: str, thread: Dict[str, Any], stats: LoadStats, timeout: float):
+    """One extension session: the four steps in order, stopping at the first failure"""
+    summarized = None
+    for path in SESSION_STEPS:
+        if path == "/step1/testConnection":
+            payload = {"test": "test"}
+        elif path == "/step4_phase2/generateUnifiedSummary":
+            payload = {
+                "question_title": thread.get("question", {}).get("title", ""),
+                "answers": summarized["answers"]
+            }
+        else:
+            payload = thread
+
+        started = time.time()
+        try:
+            body = post_json(base_url, path, payload, timeout)
+            ok = response_ok(path, body)
+        except (urllib.error.URLError, OSError, ValueError):
+            body, ok = {}, False
+        stats.record(path, time.time() - started, ok)
+
+        if not ok:
+            return
+        if path == "/step3_phase2/summarizeWithWeights":
+            summarized = body
+    stats.session_completed()
+
+
+# =============================================================================
+# Local backend
+# =============================================================================
+
+def start_local_backend(port: int, workdir: str, extra_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Start `uvicorn app:app` with tiny stand-in models and wait until it answers"""
+    env = dict(os.environ)
+    env.update({
+        "ABSOSUM_PHASE1_MODEL": build_tiny_model(os.path.join(workdir, "phase1"), seed=1),
+        "ABSOSUM_PHASE2_MODEL": build_tiny_model(os.path.join(workdir, "phase2"), seed=2),
+        "ABSOSUM_JOB_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(extra_env or {})
+    log = open(os.path.join(workdir, f"backend-{port}.log"), "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited early, see {log.name}")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return process
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Backend did not start within 120s, see {log.name}")
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def print_report(title: str, endpoints: Dict[str, Dict[str, Any]], memory: Optional[Dict[str, Any]] = None):
+    print(f"\n📊 {title}")
+    print(f"{'endpoint':<40} {'reqs':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for path in SESSION_STEPS:
+        s = endpoints.get(path)
+        if s:
+            print(f"{path:<40} {s['requests']:>6} {s['error_rate'] * 100:>5.1f}% "
+                  f"{s['p50']:>7.2f}s {s['p95']:>7.2f}s {s['p99']:>7.2f}s")
+    if memory and memory.get("available"):
+        print(f"🧠 Backend RSS: {memory['start_mb']} -> {memory['end_mb']} MB "
+              f"(max {memory['max_mb']} MB, {memory['growth_mb_per_hour']:+} MB/hour)")
+
+
+def run_load(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    threads = load_threads(args.sessions) if args.sessions else None
+    stats = LoadStats()
+    memory = MemorySampler(args.backend_pid, args.memory_interval)
+    memory.start()
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="loadtest")
+    # Open loop lets up to `max_queue` arrivals wait for a worker; closed loop never queues
+    in_flight = threading.Semaphore(args.concurrency + (args.max_queue if args.rate > 0 else 0))
+    started = time.time()
+    next_report = started + args.report_interval
+
+    def _session(thread):
+        try:
+            run_session(args.url, thread, stats, args.timeout)
+        finally:
+            in_flight.release()
+
+    print(f"🚀 Load test against {args.url}: concurrency={args.concurrency}, "
+          f"rate={args.rate or 'closed-loop'}/s, duration={args.duration}s")
+    while time.time() - started < args.duration:
+        thread = rng.choice(threads) if threads else synthetic_thread(rng)
+        if args.rate > 0:
+            # Open loop: Poisson arrivals; drop sessions when too many are waiting
+            time.sleep(rng.expovariate(args.rate))
+            if not in_flight.acquire(blocking=False):
+                stats.sessions_dropped += 1
+                continue
+        else:
+            # Closed loop: keep `concurrency` sessions running back to back
+            in_flight.acquire()
+        stats.sessions_started += 1
+        executor.submit(_session, thread)
+
+        if time.time() >= next_report:
+            elapsed = int(time.time() - started)
+            print_report(f"Last {args.report_interval}s (t={elapsed}s)", stats.take_window(), memory.summary())
+            next_report += args.report_interval
+
+    executor.shutdown(wait=True)
+    memory.stop()
+    elapsed = time.time() - started
+
+    report = {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration": round(elapsed, 1),
+        "sessions": {
+            "started": stats.sessions_started,
+            "completed": stats.sessions_completed,
+            "dropped": stats.sessions_dropped,
+            "throughput_per_min": round(stats.sessions_completed / elapsed * 60, 2) if elapsed else 0.0,
+        },
+        "endpoints": stats.totals(),
+        "memory": memory.summary(),
+    }
+    print_report(f"Total ({report['sessions']['completed']}/{report['sessions']['started']} sessions completed, "
+                 f"{report['sessions']['dropped']} dropped)", report["endpoints"], report["memory"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AbSOSUM backend load / soak test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--start-backend", action="store_true", help="Start a local backend with tiny stand-in models")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --start-backend")
+    parser.add_argument("--backend-pid", type=int, default=None, help="PID of a running backend to sample memory from")
+    parser.add_argument("--sessions", default=None, help="JSONL of scraped threads to replay (default: synthetic)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions in flight at once")
+    parser.add_argument("--rate", type=float, default=1.0, help="Session arrivals per second (0 = closed loop)")
+    parser.add_argument("--max-queue", type=int, default=32, help="Arrivals allowed to wait for a free slot")
+    parser.add_argument("--duration", type=float, default=60, help="Run time in seconds")
+    parser.add_argument("--report-interval", type=float, default=60, help="Seconds between window reports")
+    parser.add_argument("--memory-interval", type=float, default=5, help="Seconds between RSS samples")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the final report as JSON")
+    args = parser.parse_args()
+
+    backend = None
+    workdir = None
+    if args.start_backend:
+        workdir = tempfile.mkdtemp(prefix="absosum-loadtest-")
+        print(f"📦 Starting local backend with tiny models in {workdir}...")
+        # All sessions come from this host, so a per-client quota would throttle the whole run
+        backend = start_local_backend(args.port, workdir, {"ABSOSUM_CLIENT_TOKENS_PER_MINUTE": "0"})
+        args.url = f"http://127.0.0.1:{args.port}"
+        args.backend_pid = backend.pid
+
+    try:
+        report = run_load(args)
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
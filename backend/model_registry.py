@@ -0,0 +1,327 @@
+"""
+ABSOSUM - Model Registry
+Loads models by name/version on demand, tracks resident memory and evicts
+idle models under a RAM budget. Aliases ("phase1", "phase2") can be
+hot-swapped to a new version without dropping in-flight requests.
+"""
+
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ModelKey = Tuple[str, str]
+
+
+def model_nbytes(model: Any) -> int:
+    """Resident size of a torch module (parameters + buffers) in bytes"""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelLease:
+    """A model/tokenizer pair borrowed from the registry for one request"""
+
+    def __init__(self, entry: "_ModelEntry"):
+        self.model = entry.model
+        self.tokenizer = entry.tokenizer
+        self.name = entry.name
+        self.version = entry.version
+
+
+class _ModelEntry:
+    def __init__(self, name: str, version: str, model: Any, tokenizer: Any, nbytes: int):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.tokenizer = tokenizer
+        self.nbytes = nbytes
+        self.refs = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.retired = False
+
+
+class ModelRegistry:
+    """
+    Registry of resident seq2seq models.
+
+    - `loader(name, version, alias)` must return `(model, tokenizer)`; `alias`
+      is the role the model is loaded for (e.g. to prepare it for that role).
+    - Aliases map a role (e.g. "phase1") to a (name, version) spec; models are
+      loaded lazily on first `acquire()` and reloaded after eviction.
+    - Models with no active lease are evicted least-recently-used first when
+      the resident total exceeds `memory_budget_bytes` (0 = unlimited), and
+      after `idle_ttl_seconds` without use (0 = never).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str], Tuple[Any, Any]],
+        memory_budget_bytes: int = 0,
+        idle_ttl_seconds: float = 0,
+        on_unload: Optional[Callable[[], None]] = None,
+    ):
+        self._loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._on_unload = on_unload
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self._aliases: Dict[str, ModelKey] = {}
+        self._entries: Dict[ModelKey, _ModelEntry] = {}
+        self._reaper: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------------------
+    # Aliases
+    # -------------------------------------------------------------------------
+
+    def register(self, alias: str, name: str, version: str = "main"):
+        """Point an alias at a model spec (does not load it)"""
+        with self._lock:
+            self._aliases[alias] = (name, version)
+
+    def is_registered(self, alias: str) -> bool:
+        with self._lock:
+            return alias in self._aliases
+
+    def spec(self, alias: str) -> Optional[ModelKey]:
+        with self._lock:
+            return self._aliases.get(alias)
+
+    # -------------------------------------------------------------------------
+    # Loading / leasing
+    # -------------------------------------------------------------------------
+
+    def ensure_loaded(self, alias: str) -> ModelKey:
+        """Load the model behind `alias` if it is not resident; raises on failure"""
+        with self._lock:
+            if alias not in self._aliases:
+                raise KeyError(f"Unknown model alias: {alias}")
+            key = self._aliases[alias]
+        self._load(key, alias)
+        return key
+
+    @contextmanager
+    def acquire(self, alias: str):
+        """
+        Borrow the current model for `alias`. The entry cannot be evicted while
+        the lease is held, and a hot-swap only retires it after release.
+        """
+        entry = self._checkout(alias)
+        try:
+            yield ModelLease(entry)
+        finally:
+            self._release(entry)
+
+    def _checkout(self, alias: str) -> _ModelEntry:
+        while True:
+            key = self.ensure_loaded(alias)
+            with self._lock:
+                entry = self._entries.get(key)
+                # Evicted between load and checkout -> load again
+                if entry is not None and not entry.retired:
+                    entry.refs += 1
+                    entry.last_used = time.time()
+                    return entry
+
+    def resident_tokenizer(self, alias: str) -> Optional[Any]:
+        """Tokenizer of the model behind `alias` if it is resident (never loads, does not count as use)"""
+        with self._lock:
+            entry = self._entries.get(self._aliases.get(alias))
+            return entry.tokenizer if entry is not None and not entry.retired else None
+
+    def _release(self, entry: _ModelEntry):
+        with self._lock:
+            entry.refs -= 1
+            entry.last_used = time.time()
+            dropped = entry.retired and entry.refs == 0
+            if dropped:
+                self._drop_locked(entry)
+            # Models that were pinned by leases may now be evictable
+            evicted = self._enforce_budget_locked(keep=None)
+        if dropped:
+            print(f"♻️ Retired model unloaded: {entry.name}@{entry.version}")
+        for old in evicted:
+            print(f"♻️ Evicted model over memory budget: {old.name}@{old.version}")
+        if dropped or evicted:
+            self._after_unload()
+
+    def _load(self, key: ModelKey, alias: str, replaces: Optional[ModelKey] = None) -> _ModelEntry:
+        """Load `key` if needed; `replaces` is a model about to be unloaded by a swap (not counted against the budget)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.retired:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and not entry.retired:
+                    return entry
+
+            name, version = key
+            model, tokenizer = self._loader(name, version, alias)
+            entry = _ModelEntry(name, version, model, tokenizer, model_nbytes(model))
+
+            with self._lock:
+                self._entries[key] = entry
+                evicted = self._enforce_budget_locked(keep=key, outgoing=replaces)
+            for old in evicted:
+                print(f"♻️ Evicted model over memory budget: {old.name}@{old.version}")
+            if evicted:
+                self._after_unload()
+            return entry
+
+    # -------------------------------------------------------------------------
+    # Hot swap
+    # -------------------------------------------------------------------------
+
+    def swap(self, alias: str, name: str, version: str = "main") -> ModelKey:
+        """
+        Load `name@version` and atomically point `alias` at it. Requests that
+        already hold a lease on the previous model finish on it; the previous
+        model is unloaded once its last lease is released.
+        """
+        new_key = (name, version)
+        with self._lock:
+            old_key = self._aliases.get(alias)
+            aliased_elsewhere = any(k == old_key for a, k in self._aliases.items() if a != alias)
+        # The previous model is retired right after loading, so it must not push
+        # other idle models (e.g. the other phase) out of the budget
+        outgoing = old_key if old_key != new_key and not aliased_elsewhere else None
+        self._load(new_key, alias, replaces=outgoing)
+
+        with self._lock:
+            old_key = self._aliases.get(alias)
+            self._aliases[alias] = new_key
+            old_entry = self._entries.get(old_key) if old_key and old_key != new_key else None
+            still_aliased = old_key in self._aliases.values()
+            dropped = False
+            if old_entry is not None and not still_aliased:
+                old_entry.retired = True
+                if old_entry.refs == 0:
+                    self._drop_locked(old_entry)
+                    dropped = True
+        if dropped:
+            self._after_unload()
+        return new_key
+
+    # -------------------------------------------------------------------------
+    # Eviction
+    # -------------------------------------------------------------------------
+
+    def unload(self, alias: str) -> bool:
+        """Unload the model behind `alias` if no request is using it"""
+        with self._lock:
+            key = self._aliases.get(alias)
+            entry = self._entries.get(key) if key else None
+            if entry is None or entry.refs > 0:
+                return False
+            self._drop_locked(entry)
+        self._after_unload()
+        return True
+
+    def evict_idle(self) -> List[ModelKey]:
+        """Unload models that have been idle longer than `idle_ttl_seconds`"""
+        if self.idle_ttl_seconds <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            idle = [
+                e for e in self._entries.values()
+                if e.refs == 0 and now - e.last_used > self.idle_ttl_seconds
+            ]
+            for entry in idle:
+                self._drop_locked(entry)
+        for entry in idle:
+            print(f"♻️ Evicted idle model: {entry.name}@{entry.version}")
+        if idle:
+            self._after_unload()
+        return [(e.name, e.version) for e in idle]
+
+    def start_reaper(self, interval_seconds: float = 30.0):
+        """Start a daemon thread that periodically evicts idle models"""
+        if self._reaper is not None or self.idle_ttl_seconds <= 0:
+            return
+
+        def _run():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    print(f"⚠️ Idle eviction failed: {e}")
+
+        self._reaper = threading.Thread(target=_run, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def _enforce_budget_locked(self, keep: Optional[ModelKey], outgoing: Optional[ModelKey] = None) -> List[_ModelEntry]:
+        if self.memory_budget_bytes <= 0 or self._resident_bytes_locked(outgoing) <= self.memory_budget_bytes:
+            return []
+        evicted = []
+        candidates = sorted(
+            (e for k, e in self._entries.items() if k not in (keep, outgoing) and e.refs == 0),
+            key=lambda e: e.last_used,
+        )
+        for entry in candidates:
+            if self._resident_bytes_locked(outgoing) <= self.memory_budget_bytes:
+                break
+            self._drop_locked(entry)
+            evicted.append(entry)
+        if keep is not None and self._resident_bytes_locked(outgoing) > self.memory_budget_bytes:
+            print("⚠️ Model memory budget exceeded by models that are in use")
+        return evicted
+
+    def _drop_locked(self, entry: _ModelEntry):
+        key = (entry.name, entry.version)
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.model = None
+        entry.tokenizer = None
+
+    def _after_unload(self):
+        gc.collect()
+        if self._on_unload is not None:
+            self._on_unload()
+
+    # -------------------------------------------------------------------------
+    # Introspection
+    # -------------------------------------------------------------------------
+
+    def _resident_bytes_locked(self, exclude: Optional[ModelKey] = None) -> int:
+        return sum(e.nbytes for k, e in self._entries.items() if k != exclude)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._resident_bytes_locked()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aliases and resident models, for the /models endpoint"""
+        now = time.time()
+        with self._lock:
+            return {
+                "aliases": {
+                    alias: {"name": name, "version": version}
+                    for alias, (name, version) in self._aliases.items()
+                },
+                "resident": [
+                    {
+                        "name": e.name,
+                        "version": e.version,
+                        "memory_mb": round(e.nbytes / (1024 * 1024), 2),
+                        "in_flight": e.refs,
+                        "idle_seconds": round(now - e.last_used, 1) if e.refs == 0 else 0.0,
+                        "retired": e.retired,
+                    }
+                    for e in self._entries.values()
+                ],
+                "resident_mb": round(self._resident_bytes_locked() / (1024 * 1024), 2),
+                "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 2),
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+            }
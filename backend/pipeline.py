@@ -0,0 +1,106 @@
+"""
+ABSOSUM - Batch Pipeline
+Overlaps the CPU-side stages of batched summarization with generation:
+while batch k is generating, batch k+1 is tokenized and batch k-1 is decoded
+on helper threads.
+"""
+
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+
+
+def _finished(result: Any = None, error: Optional[BaseException] = None) -> Future:
+    future: Future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def run_pipelined(
+    items: List[Any],
+    tokenize: Callable[[Any], Any],
+    generate: Callable[[Any], Any],
+    decode: Callable[[Any], Any],
+    on_done: Callable[[int, Any, Optional[BaseException]], None],
+    executor: Executor,
+):
+    """
+    Run `decode(generate(tokenize(item)))` for every item, in three overlapped stages.
+
+    `tokenize` and `decode` run on `executor`; `generate` runs on the calling
+    thread. `on_done(index, result, error)` is called in item order once an
+    item is decoded (or failed in any stage). If `on_done` raises, the
+    pipeline stops and the exception propagates.
+    """
+    if not items:
+        return
+
+    next_tokenized = executor.submit(tokenize, items[0])
+    pending = None  # (index, decode future) of the previous item
+    try:
+        for k in range(len(items)):
+            tokenized = next_tokenized
+            next_tokenized = executor.submit(tokenize, items[k + 1]) if k + 1 < len(items) else None
+
+            try:
+                outputs = generate(tokenized.result())
+                decoded = executor.submit(decode, outputs)
+            except Exception as e:
+                decoded = _finished(error=e)
+
+            # Batch k-1 was decoding while batch k generated
+            if pending is not None:
+                _emit(pending, on_done)
+            pending = (k, decoded)
+
+        _emit(pending, on_done)
+        pending = None
+    finally:
+        if next_tokenized is not None:
+            next_tokenized.cancel()
+
+
+def _emit(pending, on_done):
+    index, decoded = pending
+    try:
+        result = decoded.result()
+    except Exception as e:
+        on_done(index, None, e)
+        return
+    on_done(index, result, None)
+
+
+class StagingBuffers:
+    """
+    Reusable host buffers for copying tokenized batches to the GPU.
+
+    Buffers are pinned and grown on demand, so consecutive batches reuse the
+    same memory instead of allocating new pageable tensors. `slots` buffers
+    are rotated so batch k+1 can be staged while batch k's copy is in flight.
+    On CPU the tokenizer output is used as is.
+    """
+
+    def __init__(self, device: torch.device, slots: int = 2):
+        self.device = device
+        self.slots = slots
+        self._buffers: List[Dict[str, torch.Tensor]] = [{} for _ in range(slots)]
+
+    def to_device(self, inputs: Dict[str, torch.Tensor], slot: int) -> Dict[str, torch.Tensor]:
+        if self.device.type != "cuda":
+            return inputs
+
+        buffers = self._buffers[slot % self.slots]
+        staged = {}
+        for key, tensor in inputs.items():
+            buffer = buffers.get(key)
+            if buffer is None or buffer.numel() < tensor.numel() or buffer.dtype != tensor.dtype:
+                buffer = torch.empty(tensor.numel(), dtype=tensor.dtype).pin_memory()
+                buffers[key] = buffer
+            host = buffer[:tensor.numel()].view(tensor.shape)
+            host.copy_(tensor)
+            staged[key] = host.to(self.device, non_blocking=True)
+        return staged
@@ -0,0 +1,184 @@
+"""
+ABSOSUM - Hot Question Prefetcher
+Counts how often each question is requested (exponentially decayed, so
+the ranking follows what is trending now) and keeps its latest answers.
+While the server has no live work, a background thread re-runs the
+weighted summaries and the unified summary of the top-N questions, so
+their results are already in the summary caches when the next visitor
+arrives. Prefetching stops between batches as soon as live work shows up.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from summary_cache import text_digest, thread_fingerprint
+
+
+class PrefetchYield(Exception):
+    """Raised inside a prefetch run to give the models back to live traffic"""
+
+
+def question_key(title: str) -> str:
+    return text_digest(" ".join(title.lower().split()))
+
+
+class HotQuestions:
+    """
+    Decayed request counts per question (half-life `half_life_seconds`) plus
+    the latest title / answers seen for it. Keeps at most `max_questions`;
+    the coldest are forgotten first.
+    """
+
+    def __init__(self, max_questions: int = 1000, half_life_seconds: float = 3600.0):
+        self.max_questions = max_questions
+        self.decay_rate = math.log(2) / half_life_seconds
+        self._questions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _score(self, entry: Dict[str, Any], now: float) -> float:
+        return entry["score"] * math.exp(-self.decay_rate * (now - entry["updated"]))
+
+    def record(self, title: str, answers: List[Dict[str, Any]]):
+        if not title or not title.strip() or not answers:
+            return
+        key = question_key(title)
+        now = time.time()
+        with self._lock:
+            entry = self._questions.get(key)
+            if entry is None:
+                entry = self._questions[key] = {"key": key, "score": 0.0, "requests": 0, "updated": now}
+            entry["score"] = self._score(entry, now) + 1.0
+            entry["updated"] = now
+            entry["requests"] += 1
+            entry["title"] = title
+            # Only the fields Phase 1 and the weights need (not summaries from earlier steps)
+            entry["answers"] = [
+                {k: a[k] for k in ("id", "votes", "score", "is_accepted", "content") if k in a}
+                for a in answers if isinstance(a, dict)
+            ]
+            entry["fingerprint"] = thread_fingerprint({"answers": entry["answers"]})
+
+            if len(self._questions) > self.max_questions:
+                coldest = min(self._questions.values(), key=lambda e: self._score(e, now))
+                del self._questions[coldest["key"]]
+
+    def top(self, n: int, min_requests: int = 1) -> List[Dict[str, Any]]:
+        """The `n` hottest questions requested at least `min_requests` times (copies)"""
+        now = time.time()
+        with self._lock:
+            entries = [dict(e) for e in self._questions.values() if e["requests"] >= min_requests]
+        for entry in entries:
+            entry["score"] = self._score(entry, now)
+        entries.sort(key=lambda e: e["score"], reverse=True)
+        return entries[:n]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._questions)
+
+
+class Prefetcher:
+    """
+    Every `interval_seconds`, if `is_idle()`, runs `warm(entry)` for the
+    hottest questions that were not warmed with their current answers in
+    the last `refresh_seconds`. `warm` should raise PrefetchYield when live
+    work arrives; the question is then retried on a later idle tick.
+    """
+
+    def __init__(
+        self,
+        hot: HotQuestions,
+        warm: Callable[[Dict[str, Any]], None],
+        is_idle: Callable[[], bool],
+        top_n: int = 10,
+        min_requests: int = 2,
+        interval_seconds: float = 5.0,
+        refresh_seconds: float = 900.0,
+    ):
+        self.hot = hot
+        self.warm = warm
+        self.is_idle = is_idle
+        self.top_n = top_n
+        self.min_requests = min_requests
+        self.interval_seconds = interval_seconds
+        self.refresh_seconds = refresh_seconds
+        self._warmed: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.runs = 0
+        self.yields = 0
+        self.failures = 0
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        warmed = self._warmed.get(entry["key"])
+        return (
+            warmed is not None
+            and warmed["fingerprint"] == entry["fingerprint"]
+            and now - warmed["at"] < self.refresh_seconds
+        )
+
+    def run_once(self) -> int:
+        """Warm stale hot questions while idle; returns how many were warmed"""
+        warmed = 0
+        for entry in self.hot.top(self.top_n, self.min_requests):
+            if self._stop.is_set() or not self.is_idle():
+                break
+            with self._lock:
+                if self._is_fresh(entry, time.time()):
+                    continue
+            try:
+                self.warm(entry)
+            except PrefetchYield:
+                with self._lock:
+                    self.yields += 1
+                break
+            except Exception as e:
+                print(f"⚠️ Prefetch of '{entry['title'][:60]}' failed: {e}")
+                with self._lock:
+                    self.failures += 1
+                continue
+            with self._lock:
+                self._warmed[entry["key"]] = {"fingerprint": entry["fingerprint"], "at": time.time()}
+                # Forget questions that fell out of the tracker
+                if len(self._warmed) > self.hot.max_questions:
+                    self._warmed.pop(next(iter(self._warmed)))
+                self.runs += 1
+            warmed += 1
+        return warmed
+
+    def start(self):
+        def _run():
+            while not self._stop.wait(self.interval_seconds):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"⚠️ Prefetcher error: {e}")
+
+        threading.Thread(target=_run, name="absosum-prefetch", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        hot = self.hot.top(self.top_n, self.min_requests)
+        with self._lock:
+            return {
+                "tracked_questions": len(self.hot),
+                "top_n": self.top_n,
+                "warmed_runs": self.runs,
+                "yields": self.yields,
+                "failures": self.failures,
+                "hot": [
+                    {
+                        "title": e["title"],
+                        "score": round(e["score"], 3),
+                        "requests": e["requests"],
+                        "answers": len(e["answers"]),
+                        "warm": self._is_fresh(e, now),
+                    }
+                    for e in hot
+                ],
+            }
@@ -0,0 +1,244 @@
+"""
+ABSOSUM - Request Profiling
+Per-request stage timings (tokenization, encoder, decoder, detokenization,
+JSON serialization) together with the request shape (answer count, input /
+output token lengths). A trace is written to a local directory when the
+request asks for it (`"profile": true`) or when it is slower than a
+threshold. Profiled requests also run every generate() call under the torch
+profiler and export one Chrome trace per call.
+"""
+
+import glob
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+import torch
+
+STAGE_TOKENIZATION = "tokenization"
+STAGE_ENCODER = "encoder"
+STAGE_DECODER = "decoder"
+STAGE_DETOKENIZATION = "detokenization"
+STAGE_SERIALIZATION = "serialization"
+
+# Set on the thread running generate() so the encoder hooks know which trace to charge
+_generating = threading.local()
+_hooks_lock = threading.Lock()
+
+
+class RequestTrace:
+    """
+    Stage timings and shape of one request. Stages are summed over batches;
+    in pipelined batches tokenization / detokenization overlap generation,
+    so the stage sum can exceed the wall-clock total.
+    """
+
+    def __init__(self, endpoint: str, requested: bool = False, profile: bool = False):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.requested = requested
+        self.profile = profile
+        self.started = time.time()
+        self.stages: Dict[str, float] = {}
+        self.answer_count = 0
+        self.input_tokens: List[int] = []
+        self.output_tokens: List[int] = []
+        self.generate_profiles: List[Any] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block (and label it in the torch trace when profiling)"""
+        started = time.perf_counter()
+        try:
+            with torch.profiler.record_function(name) if self.profile else nullcontext():
+                yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def record_inputs(self, attention_mask: torch.Tensor):
+        lengths = attention_mask.sum(dim=-1).tolist()
+        with self._lock:
+            self.input_tokens.extend(int(n) for n in lengths)
+
+    def record_outputs(self, outputs: torch.Tensor, pad_token_id: Optional[int]):
+        if pad_token_id is None:
+            lengths = [outputs.shape[-1]] * outputs.shape[0]
+        else:
+            lengths = (outputs != pad_token_id).sum(dim=-1).tolist()
+        with self._lock:
+            self.output_tokens.extend(int(n) for n in lengths)
+
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    def shape(self) -> Dict[str, Any]:
+        return {
+            "answers": self.answer_count,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_input_tokens": sum(self.input_tokens),
+            "max_input_tokens": max(self.input_tokens, default=0),
+            "total_output_tokens": sum(self.output_tokens),
+        }
+
+
+def _synchronize(device: torch.device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def _ensure_encoder_hooks(encoder):
+    """Install (once per encoder) hooks that time encoder forwards of traced generate() calls"""
+    with _hooks_lock:
+        if getattr(encoder, "_absosum_timing_hooks", False):
+            return
+
+        def before(module, args):
+            if getattr(_generating, "trace", None) is not None:
+                _synchronize(_generating.device)
+                _generating.encoder_started = time.perf_counter()
+
+        def after(module, args, output):
+            if getattr(_generating, "trace", None) is not None:
+                _synchronize(_generating.device)
+                seconds = time.perf_counter() - _generating.encoder_started
+                _generating.encoder_seconds += seconds
+                _generating.trace.add(STAGE_ENCODER, seconds)
+
+        encoder.register_forward_pre_hook(before)
+        encoder.register_forward_hook(after)
+        encoder._absosum_timing_hooks = True
+
+
+def traced_generate(model, inputs: Dict[str, Any], trace: RequestTrace, **generate_kwargs):
+    """
+    model.generate() without autograd, charging encoder and decoder time to
+    `trace` (and capturing a torch profile when the trace is profiled).
+    Runs on the inference worker thread, so the profiler is started here.
+    """
+    device = next(model.parameters()).device
+    _ensure_encoder_hooks(model.get_encoder())
+    trace.record_inputs(inputs["attention_mask"])
+
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if device.type == "cuda":
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    profiler = torch.profiler.profile(activities=activities) if trace.profile else nullcontext()
+
+    _generating.trace = trace
+    _generating.device = device
+    _generating.encoder_seconds = 0.0
+    started = time.perf_counter()
+    try:
+        with profiler, torch.no_grad():
+            outputs = model.generate(**inputs, **generate_kwargs)
+        _synchronize(device)
+        trace.add(STAGE_DECODER, time.perf_counter() - started - _generating.encoder_seconds)
+    finally:
+        _generating.trace = None
+
+    if trace.profile:
+        trace.generate_profiles.append(profiler)
+    trace.record_outputs(outputs, model.config.pad_token_id)
+    return outputs
+
+
+class RequestProfiler:
+    """
+    Decides which requests are traced and writes their traces to `trace_dir`.
+
+    - requested (`profile=True`): torch profile + stage timings, always written
+    - sampled (`sample_rate` of all requests): torch profile, written if slow
+    - any request slower than `slow_threshold_seconds` (0 = off): stage timings written
+    At most `max_traces` traces are kept; the oldest are deleted first.
+    """
+
+    def __init__(self, trace_dir: str, slow_threshold_seconds: float = 0.0, sample_rate: float = 0.0, max_traces: int = 200):
+        self.trace_dir = trace_dir
+        self.slow_threshold_seconds = slow_threshold_seconds
+        self.sample_rate = sample_rate
+        self.max_traces = max_traces
+        self._write_lock = threading.Lock()
+
+    def start(self, endpoint: str, requested: bool = False) -> RequestTrace:
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return RequestTrace(endpoint, requested=requested, profile=requested or sampled)
+
+    def is_slow(self, trace: RequestTrace) -> bool:
+        return self.slow_threshold_seconds > 0 and trace.elapsed() >= self.slow_threshold_seconds
+
+    def finish(self, trace: RequestTrace, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the trace if the request is profiled or slow; returns `result` (with trace info if written)"""
+        if not (trace.requested or self.is_slow(trace)):
+            return result
+
+        total_seconds = trace.elapsed()
+        # Same work FastAPI does when it sends the response
+        with trace.stage(STAGE_SERIALIZATION):
+            json.dumps(result, default=str)
+
+        path = self._write(trace, "requested" if trace.requested else "slow", total_seconds)
+        print(f"🔬 Trace {trace.trace_id} ({trace.endpoint}, {total_seconds:.2f}s) written to {path}")
+        return {
+            **result,
+            "profile": {
+                "trace_id": trace.trace_id,
+                "path": path,
+                "stages": {name: round(seconds, 4) for name, seconds in trace.stages.items()}
+            }
+        }
+
+    def _write(self, trace: RequestTrace, reason: str, total_seconds: float) -> str:
+        os.makedirs(self.trace_dir, exist_ok=True)
+        base = os.path.join(
+            self.trace_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(trace.started))}-{trace.endpoint}-{trace.trace_id}"
+        )
+
+        chrome_traces = []
+        top_ops: Dict[str, Dict[str, float]] = {}
+        for k, profile in enumerate(trace.generate_profiles):
+            chrome_path = f"{base}.generate-{k}.trace.json"
+            profile.export_chrome_trace(chrome_path)
+            chrome_traces.append(os.path.basename(chrome_path))
+            for event in profile.key_averages():
+                op = top_ops.setdefault(event.key, {"calls": 0, "self_cpu_ms": 0.0})
+                op["calls"] += event.count
+                op["self_cpu_ms"] += event.self_cpu_time_total / 1000.0
+
+        record = {
+            "trace_id": trace.trace_id,
+            "endpoint": trace.endpoint,
+            "reason": reason,
+            "started_at": trace.started,
+            "total_seconds": round(total_seconds, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in trace.stages.items()},
+            "shape": trace.shape(),
+            "chrome_traces": chrome_traces,
+            "top_ops": [
+                {"name": name, "calls": op["calls"], "self_cpu_ms": round(op["self_cpu_ms"], 3)}
+                for name, op in sorted(top_ops.items(), key=lambda item: -item[1]["self_cpu_ms"])[:25]
+            ],
+        }
+        path = f"{base}.json"
+        with self._write_lock:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2)
+            self._prune()
+        return path
+
+    def _prune(self):
+        records = sorted(p for p in glob.glob(os.path.join(self.trace_dir, "*.json")) if not p.endswith(".trace.json"))
+        for old in records[:max(0, len(records) - self.max_traces)]:
+            for path in glob.glob(old[:-len(".json")] + ".*"):
+                os.remove(path)
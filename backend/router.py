@@ -0,0 +1,547 @@
+"""
+ABSOSUM - Replica Router
+Consistent-hash proxy in front of several backend replicas. Requests of the
+same thread (same answers / question) always land on the same replica, so
+that replica's summary cache is hit instead of every replica regenerating
+the thread. Replicas are health-checked; when one fails or leaves only its
+share of threads moves to the other replicas, and a joining replica takes
+over its share once it is healthy and warmed up.
+
+Examples:
+    # Route across replicas that are already running
+    python router.py --replicas http://10.0.0.5:8000,http://10.0.0.6:8000 --port 8000
+
+    # Spawn 3 local replicas with tiny stand-in models (no download) behind the router
+    python router.py --spawn 3 --port 8000
+
+Admin endpoints: GET /router/replicas, POST /router/replicas {"url": ...},
+DELETE /router/replicas?url=... Joining and leaving need the
+X-AbSOSUM-Admin-Token header (ABSOSUM_ROUTER_ADMIN_TOKEN), and only replicas
+given by --replicas / --spawn / --allow-replicas can join.
+"""
+
+import argparse
+import bisect
+import hashlib
+import hmac
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from summary_cache import thread_fingerprint
+
+REPLICA_HEADER = "X-AbSOSUM-Replica"
+# Set to the caller's address so replicas can apply per-client quotas
+# (run replicas with ABSOSUM_CLIENT_ID_HEADER=X-AbSOSUM-Client)
+CLIENT_HEADER = "X-AbSOSUM-Client"
+# Also passed through to replicas, for their admin endpoints (e.g. /models/swap)
+ADMIN_TOKEN_HEADER = "X-AbSOSUM-Admin-Token"
+# Replica response headers the router passes back besides Content-Type
+# (Retry-After comes with admission-control rejections)
+PASSTHROUGH_RESPONSE_HEADERS = ("Retry-After",)
+
+# Endpoints that load models / hold per-replica state rather than per-thread work
+BROADCAST_PATHS = {"/step1/testConnection", "/models/swap"}
+WARM_UP_PATH = "/step1/testConnection"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with `vnodes` virtual nodes per replica"""
+
+    def __init__(self, vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+
+    def add(self, node: str):
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str):
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: n for p, n in self._owners.items() if n != node}
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Distinct replicas in ring order starting at `key` (owner first, then failover order)"""
+        if not self._points:
+            return []
+        start = bisect.bisect(self._points, _hash(key))
+        nodes: List[str] = []
+        for offset in range(len(self._points)):
+            node = self._owners[self._points[(start + offset) % len(self._points)]]
+            if node not in nodes:
+                nodes.append(node)
+        return nodes
+
+
+class ReplicaPool:
+    """
+    Replica membership + health. Only healthy replicas are on the hash ring.
+    A replica enters the ring after its health check passes and it has been
+    warmed up (STEP 1 run, models loaded); it leaves the ring when a health
+    check fails or a proxied request cannot connect, and rejoins once it is
+    healthy again.
+    """
+
+    def __init__(self, vnodes: int = 64, health_interval: float = 5.0, timeout: float = 300.0):
+        self.health_interval = health_interval
+        self.timeout = timeout
+        self._ring = HashRing(vnodes)
+        self._replicas: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, url: str) -> bool:
+        url = url.rstrip("/")
+        with self._lock:
+            if url in self._replicas:
+                return False
+            self._replicas[url] = {"healthy": False, "warm": False, "last_check": None, "last_error": None, "routed": 0}
+        self.check(url)
+        return True
+
+    def remove(self, url: str) -> bool:
+        url = url.rstrip("/")
+        with self._lock:
+            if self._replicas.pop(url, None) is None:
+                return False
+            self._ring.remove(url)
+        print(f"➖ Replica {url} left, its threads move to the remaining replicas")
+        return True
+
+    def urls(self) -> List[str]:
+        with self._lock:
+            return list(self._replicas)
+
+    def healthy(self) -> List[str]:
+        with self._lock:
+            return [url for url, state in self._replicas.items() if state["healthy"]]
+
+    def route(self, key: str) -> List[str]:
+        with self._lock:
+            return self._ring.nodes_for(key)
+
+    def record_routed(self, url: str):
+        with self._lock:
+            if url in self._replicas:
+                self._replicas[url]["routed"] += 1
+
+    def mark_down(self, url: str, error: str):
+        with self._lock:
+            state = self._replicas.get(url)
+            if state is None or not state["healthy"]:
+                return
+            # A restarted replica has to be warmed up again before it rejoins
+            state["healthy"] = False
+            state["warm"] = False
+            state["last_error"] = error
+            self._ring.remove(url)
+        print(f"⚠️ Replica {url} is down ({error}), rebalancing")
+
+    def check(self, url: str):
+        """Health-check one replica and update ring membership"""
+        try:
+            with urllib.request.urlopen(url + "/", timeout=5):
+                pass
+            error = None
+        except (urllib.error.URLError, OSError) as e:
+            error = str(e)
+
+        with self._lock:
+            state = self._replicas.get(url)
+            if state is None:
+                return
+            state["last_check"] = time.time()
+            if error is not None:
+                state["last_error"] = error
+                if state["healthy"]:
+                    state["healthy"] = False
+                    state["warm"] = False
+                    self._ring.remove(url)
+                    print(f"⚠️ Replica {url} failed its health check ({error}), rebalancing")
+                return
+            if state["healthy"]:
+                return
+
+        # Warm up outside the lock (loading models can take a while)
+        if not self.warm_up(url):
+            return
+
+        with self._lock:
+            state = self._replicas.get(url)
+            if state is None or state["healthy"]:
+                return
+            state["healthy"] = True
+            state["warm"] = True
+            state["last_error"] = None
+            self._ring.add(url)
+        print(f"➕ Replica {url} joined the ring")
+
+    def warm_up(self, url: str) -> bool:
+        """Run STEP 1 on a replica so its models are loaded before it takes traffic"""
+        try:
+            body = forward(url, "POST", WARM_UP_PATH, json.dumps({"test": "router"}).encode("utf-8"), {}, self.timeout)[1]
+            result = json.loads(body.decode("utf-8"))
+        except Exception as e:
+            with self._lock:
+                if url in self._replicas:
+                    self._replicas[url]["last_error"] = f"warm-up failed: {e}"
+            return False
+        if result.get("status") != "success":
+            with self._lock:
+                if url in self._replicas:
+                    self._replicas[url]["last_error"] = f"warm-up failed: {result.get('message')}"
+            return False
+        return True
+
+    def start(self):
+        """Background health checks every `health_interval` seconds"""
+        def _run():
+            while not self._stop.wait(self.health_interval):
+                for url in self.urls():
+                    self.check(url)
+
+        threading.Thread(target=_run, name="absosum-router-health", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "replicas": [{"url": url, **state} for url, state in self._replicas.items()],
+                "healthy": sum(1 for state in self._replicas.values() if state["healthy"]),
+            }
+
+
+def _passthrough_headers(replica_headers) -> Dict[str, str]:
+    headers = {"Content-Type": replica_headers.get("Content-Type", "application/json")}
+    for name in PASSTHROUGH_RESPONSE_HEADERS:
+        if replica_headers.get(name) is not None:
+            headers[name] = replica_headers[name]
+    return headers
+
+
+class ReplicaUnavailable(Exception):
+    """The replica could not be reached; the request was not delivered, so it is safe to fail over"""
+
+
+class ReplicaTimeout(Exception):
+    """The replica took the request but did not answer within the timeout"""
+
+
+class ReplicaFailed(Exception):
+    """The connection broke after the request was sent (it may or may not have run)"""
+
+
+def forward(base_url: str, method: str, path: str, body: Optional[bytes], headers: Dict[str, str], timeout: float) -> Tuple[int, bytes, Dict[str, str]]:
+    """
+    Send one request to a replica -> (status, body, response headers to pass back).
+    HTTP error responses are returned as is. Failures raise ReplicaUnavailable
+    (connect phase), ReplicaTimeout or ReplicaFailed; only the first one
+    means the replica never saw the request.
+    """
+    request = urllib.request.Request(base_url + path, data=body if method != "GET" else None, method=method)
+    request.add_header("Content-Type", headers.get("content-type", "application/json"))
+    for name in (CLIENT_HEADER, ADMIN_TOKEN_HEADER):
+        if headers.get(name.lower()):
+            request.add_header(name, headers[name.lower()])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), _passthrough_headers(response.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), _passthrough_headers(e.headers)
+    except urllib.error.URLError as e:
+        # urlopen wraps errors raised while connecting / sending the request
+        if isinstance(e.reason, socket.timeout):
+            raise ReplicaTimeout(f"timed out after {timeout:g}s") from e
+        raise ReplicaUnavailable(str(e.reason)) from e
+    except socket.timeout as e:
+        raise ReplicaTimeout(f"timed out after {timeout:g}s") from e
+    except ConnectionRefusedError as e:
+        raise ReplicaUnavailable(str(e)) from e
+    except OSError as e:
+        raise ReplicaFailed(str(e)) from e
+
+
+# =============================================================================
+# Router app
+# =============================================================================
+
+ROUTER_TIMEOUT_SECONDS = float(os.environ.get("ABSOSUM_ROUTER_TIMEOUT_SECONDS", "300"))
+ROUTER_HEALTH_INTERVAL_SECONDS = float(os.environ.get("ABSOSUM_ROUTER_HEALTH_INTERVAL_SECONDS", "5"))
+ROUTER_VNODES = int(os.environ.get("ABSOSUM_ROUTER_VNODES", "64"))
+# Remembered job_id -> replica mappings (jobs live in the replica that accepted them)
+ROUTER_MAX_TRACKED_JOBS = 10000
+# Required to join / remove replicas (unset = membership can only be set on the command line)
+ROUTER_ADMIN_TOKEN = os.environ.get("ABSOSUM_ROUTER_ADMIN_TOKEN", "")
+
+pool = ReplicaPool(vnodes=ROUTER_VNODES, health_interval=ROUTER_HEALTH_INTERVAL_SECONDS, timeout=ROUTER_TIMEOUT_SECONDS)
+job_replicas: "OrderedDict[str, str]" = OrderedDict()
+job_replicas_lock = threading.Lock()
+# Replica URLs that may join at runtime (filled in by main())
+allowed_replicas: set = set()
+
+app = FastAPI(title="ABSOSUM Router", version="1.0.0")
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+class ReplicaRequest(BaseModel):
+    url: str
+
+
+@app.on_event("startup")
+def start_health_checks():
+    pool.start()
+
+
+@app.get("/")
+def root():
+    return {
+        "message": "ABSOSUM Router is running!",
+        "status": "ok",
+        "healthy_replicas": len(pool.healthy())
+    }
+
+
+@app.get("/router/replicas")
+def list_replicas():
+    return {"success": True, **pool.snapshot()}
+
+
+@app.post("/router/replicas")
+def join_replica(request: ReplicaRequest, http_request: Request):
+    denied = _admin_denied(http_request)
+    if denied is not None:
+        return denied
+    url = request.url.rstrip("/")
+    # The router health-checks and warms up whatever joins, so never reach arbitrary hosts
+    if url not in allowed_replicas:
+        return _error(403, f"{url} is not an allowed replica (see --replicas / --spawn / --allow-replicas)")
+    added = pool.add(url)
+    return {"success": True, "added": added, **pool.snapshot()}
+
+
+@app.delete("/router/replicas")
+def leave_replica(url: str, http_request: Request):
+    denied = _admin_denied(http_request)
+    if denied is not None:
+        return denied
+    removed = pool.remove(url)
+    return {"success": removed, **pool.snapshot()}
+
+
+def _admin_denied(http_request: Request) -> Optional[Response]:
+    """403 unless the request carries the router's admin token"""
+    if not ROUTER_ADMIN_TOKEN:
+        return _error(403, "Replica admin is disabled (set ABSOSUM_ROUTER_ADMIN_TOKEN)")
+    token = http_request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode("utf-8"), ROUTER_ADMIN_TOKEN.encode("utf-8")):
+        return _error(403, "Invalid admin token")
+    return None
+
+
+def _no_replica(detail: str) -> Response:
+    return _error(503, detail)
+
+
+def _error(status: int, detail: str, url: Optional[str] = None) -> Response:
+    return Response(
+        content=json.dumps({"success": False, "error": detail}),
+        status_code=status,
+        media_type="application/json",
+        headers={REPLICA_HEADER: url} if url else None,
+    )
+
+
+def _replica_error(url: str, e: Exception) -> Response:
+    """504 / 502 for a replica that got the request but did not answer (never retried elsewhere)"""
+    if isinstance(e, ReplicaTimeout):
+        return _error(504, f"Replica did not answer in time ({e})", url)
+    return _error(502, f"Replica connection failed ({e})", url)
+
+
+def _response(url: str, status: int, body: bytes, response_headers: Dict[str, str]) -> Response:
+    headers = {name: value for name, value in response_headers.items() if name != "Content-Type"}
+    headers[REPLICA_HEADER] = url
+    return Response(content=body, status_code=status, media_type=response_headers["Content-Type"], headers=headers)
+
+
+def _remember_job(url: str, body: bytes):
+    try:
+        job_id = json.loads(body.decode("utf-8")).get("job_id")
+    except (ValueError, AttributeError):
+        return
+    if not job_id:
+        return
+    with job_replicas_lock:
+        job_replicas[job_id] = url
+        while len(job_replicas) > ROUTER_MAX_TRACKED_JOBS:
+            job_replicas.popitem(last=False)
+
+
+def _broadcast(method: str, path: str, body: bytes, headers: Dict[str, str]) -> Response:
+    """Send to every healthy replica; reply with the first replica's answer plus per-replica results"""
+    replicas = pool.healthy()
+    if not replicas:
+        return _no_replica("No healthy replicas")
+    results = []
+    first = None
+    for url in replicas:
+        try:
+            status, payload, response_headers = forward(url, method, path, body, headers, ROUTER_TIMEOUT_SECONDS)
+        except ReplicaUnavailable as e:
+            pool.mark_down(url, str(e))
+            results.append({"url": url, "success": False, "error": str(e)})
+            continue
+        except (ReplicaTimeout, ReplicaFailed) as e:
+            # Slow or mid-request failure: leave it to the health checks
+            results.append({"url": url, "success": False, "error": str(e)})
+            continue
+        if first is None:
+            first = (url, status, payload, response_headers)
+        results.append({"url": url, "success": status < 400, "status": status})
+    if first is None:
+        return _no_replica("All replicas failed")
+    url, status, payload, response_headers = first
+    try:
+        merged = json.loads(payload.decode("utf-8"))
+        merged["replicas"] = results
+        payload = json.dumps(merged).encode("utf-8")
+    except (ValueError, AttributeError):
+        pass
+    return _response(url, status, payload, response_headers)
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "DELETE"])
+async def proxy(path: str, request: Request):
+    """Forward to the replica that owns this thread (failing over along the ring)"""
+    path = "/" + path
+    if request.url.query:
+        path += "?" + request.url.query
+    body = await request.body()
+    headers = {k.lower(): v for k, v in request.headers.items()}
+    # Never trust a client-supplied identity
+    headers[CLIENT_HEADER.lower()] = request.client.host if request.client else "unknown"
+    # Forwarding blocks on the replica, so do it off the event loop
+    return await run_in_threadpool(_route, request.method, path, body, headers)
+
+
+def _route(method: str, path: str, body: bytes, headers: Dict[str, str]) -> Response:
+    parts = path.split("?")[0].split("/")
+    if "/".join(parts) in BROADCAST_PATHS:
+        return _broadcast(method, path, body, headers)
+
+    # Job polling (GET /jobs/{id}) and cancellation go to the replica holding the job
+    if len(parts) >= 3 and parts[1] == "jobs" and (method == "GET" or parts[-1] == "cancel"):
+        job_id = parts[2]
+        with job_replicas_lock:
+            url = job_replicas.get(job_id)
+        if url is None:
+            return _error(404, "Job not found")
+        try:
+            return _response(url, *forward(url, method, path, body, headers, ROUTER_TIMEOUT_SECONDS))
+        except ReplicaUnavailable as e:
+            pool.mark_down(url, str(e))
+            return _no_replica(f"Replica holding job {job_id} is unavailable")
+        except (ReplicaTimeout, ReplicaFailed) as e:
+            return _replica_error(url, e)
+
+    try:
+        payload = json.loads(body.decode("utf-8")) if body else {}
+    except ValueError:
+        payload = {}
+    key = thread_fingerprint(payload) if isinstance(payload, dict) else thread_fingerprint({"body": body.decode("utf-8", "replace")})
+
+    candidates = pool.route(key)
+    if not candidates:
+        return _no_replica("No healthy replicas")
+    for url in candidates:
+        try:
+            status, response_body, response_headers = forward(url, method, path, body, headers, ROUTER_TIMEOUT_SECONDS)
+        except ReplicaUnavailable as e:
+            # Not delivered: take the replica out and fail over to the next one on the ring
+            pool.mark_down(url, str(e))
+            continue
+        except (ReplicaTimeout, ReplicaFailed) as e:
+            # The replica may be running it (e.g. a long generation), so retrying
+            # elsewhere could duplicate non-idempotent work; the owner answers
+            return _replica_error(url, e)
+        pool.record_routed(url)
+        if path.startswith("/jobs/") and status < 400:
+            _remember_job(url, response_body)
+        return _response(url, status, response_body, response_headers)
+    return _no_replica("All replicas failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consistent-hash router for ABSOSUM backend replicas")
+    parser.add_argument("--replicas", default=os.environ.get("ABSOSUM_ROUTER_REPLICAS", ""), help="Comma-separated replica base URLs")
+    parser.add_argument("--spawn", type=int, default=0, help="Start N local replicas with tiny stand-in models")
+    parser.add_argument("--spawn-port", type=int, default=8101, help="Port of the first spawned replica")
+    parser.add_argument(
+        "--allow-replicas",
+        default=os.environ.get("ABSOSUM_ROUTER_ALLOWED_REPLICAS", ""),
+        help="Comma-separated standby replica URLs that may join later via POST /router/replicas",
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    processes = []
+    if args.spawn:
+        from loadtest import start_local_backend
+        workdir = tempfile.mkdtemp(prefix="absosum-router-")
+        for i in range(args.spawn):
+            port = args.spawn_port + i
+            replica_dir = os.path.join(workdir, f"replica-{port}")
+            os.makedirs(replica_dir)
+            print(f"🚀 Starting local replica on port {port} (logs in {replica_dir})...")
+            processes.append(start_local_backend(port, replica_dir, {"ABSOSUM_CLIENT_ID_HEADER": CLIENT_HEADER}))
+            allowed_replicas.add(f"http://127.0.0.1:{port}")
+            pool.add(f"http://127.0.0.1:{port}")
+
+    for url in filter(None, (u.strip().rstrip("/") for u in args.allow_replicas.split(","))):
+        allowed_replicas.add(url)
+    for url in filter(None, (u.strip().rstrip("/") for u in args.replicas.split(","))):
+        allowed_replicas.add(url)
+        pool.add(url)
+
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        pool.stop()
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+ABSOSUM - Tiny stand-in models
+Builds small randomly initialised seq2seq models + tokenizers on disk so the
+backend can be started without downloading the real Phase 1 / Phase 2 models.
+"""
+
+import os
+import random
+from typing import List
+
+SPECIAL_TOKENS = ["<pad>", "<s>", "</s>", "<unk>", "<POST>", "<ANS>"]
+
+# Small programming vocabulary so synthetic StackOverflow threads tokenize to real ids
+VOCAB_WORDS = (
+    "the a an to of in for on with is are be use you can it this that and or not "
+    "python java javascript list dict array string function method class object "
+    "error exception value key index loop file path import return print call "
+    "install version update module package library api request response server "
+    "client thread process memory cache query database table column row sql "
+    "how why what when should would could will does do get set add remove sort "
+    "instead better faster answer question code example works fix problem same "
+    "above below also just like using need want first second last new old "
+).split()
+
+
+def synthetic_text(rng: random.Random, n_words: int) -> str:
+    """Random sentence-ish text drawn from the tiny vocabulary"""
+    return " ".join(rng.choice(VOCAB_WORDS) for _ in range(n_words))
+
+
+def build_tiny_model(output_dir: str, seed: int = 0, d_model: int = 32, layers: int = 1) -> str:
+    """Create a tiny BART model + fast tokenizer in `output_dir` (idempotent)"""
+    if os.path.exists(os.path.join(output_dir, "config.json")):
+        return output_dir
+
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    os.makedirs(output_dir, exist_ok=True)
+    vocab: List[str] = SPECIAL_TOKENS + sorted(set(VOCAB_WORDS))
+    backend = Tokenizer(models.WordLevel({tok: i for i, tok in enumerate(vocab)}, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        pad_token="<pad>",
+        bos_token="<s>",
+        eos_token="</s>",
+        unk_token="<unk>",
+        additional_special_tokens=["<POST>", "<ANS>"],
+    )
+    tokenizer.save_pretrained(output_dir)
+
+    torch.manual_seed(seed)
+    config = BartConfig(
+        vocab_size=len(vocab),
+        d_model=d_model,
+        encoder_layers=layers,
+        decoder_layers=layers,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=d_model * 2,
+        decoder_ffn_dim=d_model * 2,
+        max_position_embeddings=1024,
+        pad_token_id=0,
+        bos_token_id=1,
+        eos_token_id=2,
+        decoder_start_token_id=2,
+        forced_eos_token_id=2,
+    )
+    BartForConditionalGeneration(config).save_pretrained(output_dir)
+    return output_dir